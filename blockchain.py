@@ -3,43 +3,362 @@
 Minimal Blockchain implementation for HyperDB
 """
 
+import functools
 import hashlib
+import itertools
 import json
+import os
+import struct
 import time
-from typing import List, Dict, Any
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, FrozenSet, Iterable, Tuple
+
+
+# SHA-256 constructor used for block hashing, chosen once per process by
+# select_sha256_backend(). The default is hashlib's sha256, i.e. OpenSSL, which
+# dispatches at runtime to SHA-NI / ARMv8 SHA extensions when the CPU supports them.
+_sha256 = hashlib.sha256
+
+# Registered SHA-256 backends as (name, required CPU flags, constructor), in order
+# of preference. Constructors must return hashlib-compatible objects (update,
+# copy, digest, hexdigest) since mining resumes from copied midstates.
+_SHA256_BACKENDS: List[Tuple[str, FrozenSet[str], Callable]] = [
+    ('openssl', frozenset(), hashlib.sha256),
+]
+_selected_sha256_backend: Optional[str] = None
+
+# Number of consecutive nonces handed to the nonce-search kernel per call
+NONCE_BATCH_SIZE = 4096
+
+# Block hash layout written by this module. Version 1 hashed the sorted-key JSON
+# of the whole block; version 2 hashes a fixed-size binary header that commits
+# to the transactions through their digest and ends with the nonce. Version 3
+# commits to the transactions through their Merkle root and count instead, so
+# one transaction's inclusion can be proven with log2(n) hashes.
+CHAIN_VERSION = 3
+
+# Version 2 header: version, index, timestamp, previous hash, transactions digest
+_HEADER_V2 = struct.Struct('<IQd32s32s')
+# Version 3 header: version, index, timestamp, previous hash, Merkle root, count
+_HEADER_V3 = struct.Struct('<IQd32s32sI')
+# The 88-byte header plus the 8-byte nonce pads to two 64-byte SHA-256 blocks.
+# The first block never changes while mining, so the midstate absorbs it once
+# and each nonce try costs a single compression of the final block.
+_NONCE_V2 = struct.Struct('<Q')
+
+# Chains longer than this have their block hashes verified in worker processes
+PARALLEL_VALIDATION_THRESHOLD = 64
+
+
+@functools.lru_cache(maxsize=None)
+def cpu_flags() -> FrozenSet[str]:
+    """Return the CPU feature flags reported by the OS (empty if unavailable)"""
+    flags = set()
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                # x86 reports "flags", ARM reports "Features"
+                key, _, value = line.partition(':')
+                if key.strip() in ('flags', 'Features'):
+                    flags.update(value.split())
+                    break
+    except OSError:
+        pass
+    return frozenset(flags)
+
+
+def register_sha256_backend(name: str, constructor: Callable, required_flags: Iterable[str] = ()) -> None:
+    """Register a SHA-256 implementation ahead of the existing backends
+    
+    The backend is only selected on CPUs reporting all ``required_flags``
+    (e.g. ``{'sha_ni'}`` or ``{'avx2'}``). Registering resets the cached
+    selection so the next Blockchain picks it up.
+    """
+    global _selected_sha256_backend
+    _SHA256_BACKENDS.insert(0, (name, frozenset(required_flags), constructor))
+    _selected_sha256_backend = None
+
+
+def select_sha256_backend() -> str:
+    """Pick the preferred SHA-256 backend supported by this CPU and use it for hashing
+    
+    The probe runs once per process; later calls return the cached choice.
+    """
+    global _sha256, _selected_sha256_backend
+    if _selected_sha256_backend is None:
+        flags = cpu_flags()
+        for name, required_flags, constructor in _SHA256_BACKENDS:
+            if required_flags <= flags:
+                _sha256, _selected_sha256_backend = constructor, name
+                break
+    return _selected_sha256_backend
+
+
+class FrozenDict(dict):
+    """Read-only dict holding the contents of a sealed block"""
+    
+    __slots__ = ()
+    
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Sealed block contents are read-only")
+    
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def _freeze(value: Any) -> Any:
+    """Deep-copy JSON-like data into read-only dicts and tuples"""
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
 
 
 class Block:
     """Represents a block in the blockchain"""
     
-    def __init__(self, index: int, transactions: List[Dict], timestamp: float, previous_hash: str, nonce: int = 0):
+    __slots__ = ('index', 'transactions', 'timestamp', 'previous_hash', 'nonce', 'version', 'hash',
+                 'schedule', '_prefix', '_suffix', '_midstate', '_seal', '_merkle_tree')
+    
+    def __init__(self, index: int, transactions: List[Dict], timestamp: float, previous_hash: str,
+                 nonce: int = 0, version: int = CHAIN_VERSION):
+        if version not in _NONCE_ENCODERS:
+            raise ValueError(f"Unsupported block version: {version}")
+        
         self.index = index
         self.transactions = transactions
         self.timestamp = timestamp
         self.previous_hash = previous_hash
         self.nonce = nonce
-        self.hash = self.calculate_hash()
+        self.version = version
+        # Conflict-free transaction bins (see partition_transactions), recorded
+        # only by chains with several mining workers; not hashed
+        self.schedule = None
+        self._seal = None
+        self._merkle_tree = None
+        
+        # Hash through the template so mining can resume from the same midstate
+        self._prepare_hash_template()
+        self.hash = self.calculate_hash_fast(nonce).hex()
     
-    def calculate_hash(self) -> str:
-        """Calculate the hash of the block"""
-        block_string = json.dumps({
-            'index': self.index,
-            'transactions': self.transactions,
-            'timestamp': self.timestamp,
-            'previous_hash': self.previous_hash,
-            'nonce': self.nonce
-        }, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
+    @classmethod
+    def restore(cls, index: int, transactions: List[Dict], timestamp: float, previous_hash: str,
+                nonce: int, block_hash: str, version: int = CHAIN_VERSION) -> 'Block':
+        """Rebuild a persisted block around its stored hash without rehashing it
+        
+        The stored hash is trusted until is_chain_valid recomputes it, and no
+        mining template is built since persisted blocks are never mined again.
+        """
+        if version not in _NONCE_ENCODERS:
+            raise ValueError(f"Unsupported block version: {version}")
+        
+        block = cls.__new__(cls)
+        block.index = index
+        block.transactions = transactions
+        block.timestamp = timestamp
+        block.previous_hash = previous_hash
+        block.nonce = nonce
+        block.version = version
+        block.hash = block_hash
+        block.schedule = None
+        block._seal = None
+        block._merkle_tree = None
+        block._release_hash_template()
+        return block
+    
+    def calculate_hash(self, nonce: Optional[int] = None) -> str:
+        """Calculate the hash of the block, optionally for a candidate nonce"""
+        prefix, suffix = self._build_hash_template()
+        nonce_bytes = self.encode_nonce(self.nonce if nonce is None else nonce)
+        return _sha256(prefix + nonce_bytes + suffix).hexdigest()
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the block contents without the cached mining template or Merkle tree"""
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state['_prefix'] = state['_suffix'] = state['_midstate'] = state['_merkle_tree'] = None
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a block pickled by ``__getstate__``"""
+        for name, value in state.items():
+            setattr(self, name, value)
+    
+    @property
+    def encode_nonce(self) -> Callable[[int], bytes]:
+        """Encoder for the nonce bytes placed between the template prefix and suffix"""
+        return _NONCE_ENCODERS[self.version]
+    
+    def encode_transactions(self) -> str:
+        """Encode the transaction batch as the canonical JSON committed to by the block hash"""
+        if self.version == 1:
+            return json.dumps(self.transactions, sort_keys=True)
+        return json.dumps(self.transactions, sort_keys=True, separators=(',', ':'))
+    
+    def _build_hash_template(self) -> tuple:
+        """Serialize the block once as the (prefix, suffix) bytes around the nonce in the hash input"""
+        if self.version == 1:
+            # The sorted-key JSON of the block, with keys written in sorted order
+            # so the transactions are encoded once
+            prefix = '{"index": %s, "nonce": ' % json.dumps(self.index)
+            suffix = ', "previous_hash": %s, "timestamp": %s, "transactions": %s}' % (
+                json.dumps(self.previous_hash),
+                json.dumps(self.timestamp),
+                self.encode_transactions()
+            )
+            return prefix.encode(), suffix.encode()
+        
+        # A fixed binary header ends with the nonce, so the suffix is empty
+        previous_hash = bytes.fromhex(self.previous_hash.rjust(64, '0'))
+        if self.version == 2:
+            header = _HEADER_V2.pack(
+                self.version,
+                self.index,
+                self.timestamp,
+                previous_hash,
+                _sha256(self.encode_transactions().encode()).digest()
+            )
+        else:
+            header = _HEADER_V3.pack(
+                self.version,
+                self.index,
+                self.timestamp,
+                previous_hash,
+                self.merkle_levels()[-1][0],
+                len(self.transactions)
+            )
+        return header, b''
+    
+    def merkle_leaves(self) -> List[bytes]:
+        """Leaf hashes of the transactions, in block order"""
+        return [merkle_leaf(transaction) for transaction in self.transactions]
+    
+    def merkle_levels(self) -> List[List[bytes]]:
+        """Every level of the transactions' Merkle tree, from the leaves up to the root"""
+        # Only sealed, immutable transactions reuse the cached tree; unsealed
+        # ones can be edited in place, so their tree is rebuilt on every call
+        cached = self._merkle_tree
+        if self._seal is not None and cached is not None and cached[0] is self.transactions:
+            return cached[1]
+        levels = merkle_levels(self.merkle_leaves())
+        # Kept for seal(), which adopts it when the block is sealed over these contents
+        self._merkle_tree = (self.transactions, levels)
+        return levels
+    
+    def merkle_root(self) -> Optional[str]:
+        """Hex Merkle root of the transactions, or None for blocks before version 3"""
+        if self.version < 3:
+            return None
+        return self.merkle_levels()[-1][0].hex()
+    
+    def commits_to_merkle_root(self, root: bytes) -> bool:
+        """Check that the block hash covers ``root`` as its Merkle root
+        
+        Only the header is rehashed, so this costs one hash however many
+        transactions the block holds.
+        """
+        if self.version < 3:
+            return False
+        header = _HEADER_V3.pack(
+            self.version,
+            self.index,
+            self.timestamp,
+            bytes.fromhex(self.previous_hash.rjust(64, '0')),
+            root,
+            len(self.transactions)
+        )
+        return _sha256(header + self.encode_nonce(self.nonce)).hexdigest() == self.hash
+    
+    def _prepare_hash_template(self) -> None:
+        """Cache the hash template and the SHA-256 midstate of its prefix"""
+        self._prefix, self._suffix = self._build_hash_template()
+        self._midstate = _sha256(self._prefix)
+    
+    def seal(self, digest: str) -> None:
+        """Freeze the block contents and memoize ``digest`` as their hash
+        
+        ``digest`` must be the hash of the current contents. Transactions are
+        deep-copied into read-only containers, so later in-place edits raise
+        instead of silently invalidating the memoized hash.
+        """
+        cached_tree = self._merkle_tree
+        if cached_tree is not None and cached_tree[0] is not self.transactions:
+            cached_tree = None
+        self.transactions = _freeze(self.transactions)
+        if cached_tree is not None:
+            # Same contents, now in read-only containers
+            self._merkle_tree = (self.transactions, cached_tree[1])
+        self._release_hash_template()
+        self._seal = (self._header_fields(), self.transactions, digest)
+    
+    def _header_fields(self) -> tuple:
+        return (self.index, self.timestamp, self.previous_hash, self.nonce, self.version)
+    
+    def memoized_hash(self) -> Optional[str]:
+        """Return the sealed hash if the block is unchanged since sealing, else None
+        
+        Sealed transactions are immutable, so the block is unchanged as long as
+        the header fields match and ``transactions`` is still the sealed object.
+        """
+        if self._seal is None:
+            return None
+        fields, transactions, digest = self._seal
+        if transactions is not self.transactions or fields != self._header_fields():
+            return None
+        return digest
+    
+    def _release_hash_template(self) -> None:
+        """Drop the cached template, which holds a copy of the serialized transactions"""
+        self._prefix = self._suffix = self._midstate = None
+    
+    def calculate_hash_fast(self, nonce: int) -> bytes:
+        """Calculate the raw digest for a candidate nonce from the cached template
+        
+        Produces the bytes of the same digest as ``calculate_hash(nonce)`` without
+        re-serializing the transactions. Hashing resumes from the midstate of
+        the constant prefix, so only the nonce and suffix are absorbed per call.
+        The template is captured when the block is built (or on first use after
+        it was released) and does not follow later changes to the contents.
+        """
+        if self._midstate is None:
+            self._prepare_hash_template()
+        sha = self._midstate.copy()
+        sha.update(self.encode_nonce(nonce))
+        sha.update(self._suffix)
+        return sha.digest()
+
+
+# Nonce encodings by block version: ASCII digits inside the JSON (version 1)
+# or a little-endian u64 closing the binary header (versions 2 and 3)
+_NONCE_ENCODERS: Dict[int, Callable[[int], bytes]] = {
+    1: b'%d'.__mod__,
+    2: _NONCE_V2.pack,
+    3: _NONCE_V2.pack,
+}
 
 
 class Blockchain:
-    """Simple blockchain implementation"""
+    """Simple blockchain implementation
     
-    def __init__(self, difficulty: int = 2):
+    With ``mining_workers`` above 1, mined blocks record their conflict-free
+    transaction bins as ``schedule`` for validators that replay them
+    concurrently. This chain replays balances and searches nonces on the
+    calling thread, since both are too fine-grained to run outside the GIL.
+    """
+    
+    def __init__(self, difficulty: int = 2, mining_workers: int = 1):
         self.chain = []
         self.difficulty = difficulty
-        self.pending_transactions = []
+        self.mining_workers = max(1, mining_workers)
+        self.pending_transactions: deque = deque()
         self.mining_reward = 10
+        self._balances: Dict[str, float] = {}
+        self._pow_impl: Dict[int, Callable] = {}
+        self.sha256_backend = select_sha256_backend()
         
         # Create the genesis block
         self.create_genesis_block()
@@ -47,7 +366,7 @@ class Blockchain:
     def create_genesis_block(self) -> None:
         """Create the first block in the chain"""
         genesis_block = Block(0, [], time.time(), "0")
-        self.chain.append(genesis_block)
+        self.add_block(genesis_block)
     
     def get_latest_block(self) -> Block:
         """Get the most recent block in the chain"""
@@ -65,69 +384,281 @@ class Blockchain:
         self.pending_transactions.append(transaction)
         return len(self.chain) + 1  # Return the block index where this transaction will be added
     
+    def add_transactions_bulk(self, rows: List[tuple]) -> int:
+        """Add many ``(sender, recipient, amount[, data])`` transactions at once
+        
+        All transactions in the batch share a single timestamp.
+        """
+        timestamp = time.time()
+        append = self.pending_transactions.append
+        for sender, recipient, amount, *data in rows:
+            append({
+                'sender': sender,
+                'recipient': recipient,
+                'amount': amount,
+                'data': (data[0] if data else None) or {},
+                'timestamp': timestamp
+            })
+        return len(self.chain) + 1
+    
     def mine_pending_transactions(self, miner_address: str) -> Block:
         """Mine a new block with pending transactions"""
         block = Block(
             index=len(self.chain),
-            transactions=self.pending_transactions,
+            transactions=list(self.pending_transactions),
             timestamp=time.time(),
             previous_hash=self.get_latest_block().hash
         )
+        if self.mining_workers > 1:
+            block.schedule = partition_transactions(block.transactions)
         
         # Mine the block
         block = self.mine_block(block)
         
         # Add the block to the chain
-        self.chain.append(block)
+        self.add_block(block)
         
-        # Reset pending transactions and add mining reward
-        self.pending_transactions = [
-            {
-                'sender': "system",
-                'recipient': miner_address,
-                'amount': self.mining_reward,
-                'data': {},
-                'timestamp': time.time()
-            }
-        ]
+        # Reset pending transactions and queue the mining reward for the next block
+        self.pending_transactions.clear()
+        self.pending_transactions.append({
+            'sender': "system",
+            'recipient': miner_address,
+            'amount': self.mining_reward,
+            'data': {},
+            'timestamp': time.time()
+        })
         
         return block
     
+    def add_block(self, block: Block) -> None:
+        """Append a mined or persisted block and apply it to the ledger cache"""
+        block._release_hash_template()
+        self.chain.append(block)
+        
+        self._balances.update(_replay_balances(block.transactions, self._balances))
+    
     def mine_block(self, block: Block) -> Block:
-        """Mine a block by finding a valid nonce"""
-        target = "0" * self.difficulty
+        """Mine a block by finding a valid nonce
         
-        while block.hash[:self.difficulty] != target:
-            block.nonce += 1
-            block.hash = block.calculate_hash()
+        The search resumes from the hash template captured when the block was
+        built, so the block must not be modified between construction and mining.
+        """
+        if block.hash.startswith("0" * self.difficulty):
+            block.seal(block.hash)
+            return block
         
+        if block._midstate is None:
+            block._prepare_hash_template()
+        start = block.nonce + 1
+        nonce = None
+        while nonce is None:
+            nonce = self._search_nonces(block, start, start + NONCE_BATCH_SIZE)
+            start += NONCE_BATCH_SIZE
+        
+        block.nonce = nonce
+        block.hash = block.calculate_hash_fast(nonce).hex()
+        block.seal(block.hash)
         return block
     
+    def _pow_kernel(self) -> Callable:
+        """Get the proof-of-work kernel specialized for the current difficulty"""
+        kernel = self._pow_impl.get(self.difficulty)
+        if kernel is None:
+            kernel = self._pow_impl[self.difficulty] = _compile_pow(self.difficulty)
+        return kernel
+    
+    def _search_nonces(self, block: Block, start: int, stop: int) -> Optional[int]:
+        """Try nonces in range(start, stop) and return the first one meeting the difficulty"""
+        return self._pow_kernel()(block._midstate, block._suffix, block.encode_nonce, start, stop)
+    
     def is_chain_valid(self) -> bool:
         """Check if the blockchain is valid"""
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i - 1]
-            
-            # Check if current block hash is valid
-            if current_block.hash != current_block.calculate_hash():
+        # Check in one pass that every block points to the previous block and
+        # that its hash is valid. Blocks sealed since they were last hashed are
+        # checked against their memoized digest, so an unchanged chain costs
+        # no hashing at all
+        unverified = []
+        previous = self.chain[0]
+        for block in itertools.islice(self.chain, 1, None):
+            if block.previous_hash != previous.hash:
                 return False
-            
-            # Check if current block points to previous block
-            if current_block.previous_hash != previous_block.hash:
+            previous = block
+            digest = block.memoized_hash()
+            if digest is None:
+                unverified.append(block)
+            elif digest != block.hash:
                 return False
         
+        # The rest are recomputed, across worker processes for long chains, and
+        # sealed once they check out
+        digests = None
+        if len(unverified) > PARALLEL_VALIDATION_THRESHOLD:
+            try:
+                chunksize = max(1, len(unverified) // (4 * (os.cpu_count() or 1)))
+                with ProcessPoolExecutor() as executor:
+                    digests = list(executor.map(_compute_block_hash, unverified, chunksize=chunksize))
+            except (OSError, RuntimeError):
+                # Process pools are unavailable in some sandboxes; verify inline
+                pass
+        if digests is None:
+            digests = map(_compute_block_hash, unverified)
+        
+        for block, digest in zip(unverified, digests):
+            if digest != block.hash:
+                return False
+            block.seal(digest)
+        
         return True
     
     def get_balance(self, address: str) -> float:
-        """Calculate the balance of an address"""
-        balance = 0.0
-        
-        for block in self.chain:
-            for transaction in block.transactions:
-                if transaction['sender'] == address:
-                    balance -= transaction['amount']
-                if transaction['recipient'] == address:
-                    balance += transaction['amount']
-        
-        return balance 
\ No newline at end of file
+        """Get the balance of an address from the ledger cache"""
+        return self._balances.get(address, 0.0)
+
+
+def _compute_block_hash(block: Block) -> str:
+    """Recompute a block's hash from its contents"""
+    return block.calculate_hash()
+
+
+# Proof-of-work kernel source. search(midstate, suffix, encode_nonce, start,
+# stop) returns the first nonce in range(start, stop) whose digest passes
+# {test}. It works only on the prefix midstate, nonce encoder and suffix
+# bytes of a block template, so each try makes no method calls or attribute
+# loads on Block, and digests are compared as raw bytes
+_POW_TEMPLATE = """
+def search(midstate, suffix, encode_nonce, start, stop):
+    copy = midstate.copy
+    if suffix:
+        for nonce in range(start, stop):
+            sha = copy()
+            sha.update(encode_nonce(nonce))
+            sha.update(suffix)
+            digest = sha.digest()
+            if {test}:
+                return nonce
+    else:
+        for nonce in range(start, stop):
+            sha = copy()
+            sha.update(encode_nonce(nonce))
+            digest = sha.digest()
+            if {test}:
+                return nonce
+    return None
+"""
+
+
+def _compile_pow(difficulty: int) -> Callable:
+    """Generate the proof-of-work kernel with the difficulty threshold baked in
+    
+    The largest digest with ``difficulty`` leading hex zeros is written into
+    the loop as a bytes literal, so each try is a single constant comparison
+    with no threshold loaded or computed.
+    """
+    if not 0 <= difficulty <= 64:
+        raise ValueError(f"Unsupported difficulty: {difficulty}")
+    
+    limit = ((1 << (256 - 4 * difficulty)) - 1).to_bytes(32, 'big')
+    source = _POW_TEMPLATE.format(test=f"digest <= {limit!r}")
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, f"<pow difficulty={difficulty}>", "exec"), namespace)
+    return namespace['search']
+
+
+def merkle_leaf(transaction: Dict) -> bytes:
+    """Hash one transaction as a Merkle leaf over its canonical compact JSON"""
+    return _sha256(json.dumps(transaction, sort_keys=True, separators=(',', ':')).encode()).digest()
+
+
+def merkle_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    """Build every level of the Merkle tree, from the leaves up to the root
+    
+    Each parent hashes the concatenation of its two children; a level with an
+    odd number of nodes pairs its last node with itself. An empty batch has
+    the hash of empty input as its root. Block headers also commit to the leaf
+    count, so duplicating the last node cannot make two batches collide.
+    """
+    level = list(leaves) or [_sha256(b'').digest()]
+    levels = [level]
+    while len(level) > 1:
+        level = hash_merkle_level(level)
+        levels.append(level)
+    return levels
+
+
+def hash_merkle_level(level: List[bytes]) -> List[bytes]:
+    """Hash adjacent pairs of a Merkle level into its parent level
+    
+    Each pair is one 64-byte concatenation passed to a single one-shot sha256
+    call. This is the entry point to replace with a multi-buffer hashing
+    extension.
+    """
+    if len(level) % 2:
+        level = level + [level[-1]]
+    sha256 = _sha256
+    return [sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    """Merkle root of a batch of leaf hashes"""
+    return merkle_levels(leaves)[-1][0]
+
+
+def merkle_proof(levels: List[List[bytes]], index: int) -> List[Tuple[bytes, bool]]:
+    """Sibling path for leaf ``index`` as (sibling hash, sibling is on the right) pairs"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        proof.append((level[sibling] if sibling < len(level) else level[index], sibling > index))
+        index //= 2
+    return proof
+
+
+def verify_merkle_proof(leaf: bytes, proof: Iterable[Tuple[bytes, bool]], root: bytes) -> bool:
+    """Check that ``leaf`` hashes up to ``root`` along ``proof``"""
+    node = leaf
+    for sibling, sibling_on_right in proof:
+        node = _sha256(node + sibling if sibling_on_right else sibling + node).digest()
+    return node == root
+
+
+def partition_transactions(transactions: List[Dict]) -> List[List[int]]:
+    """Group transaction indices into bins that share no sender or recipient
+    
+    Transactions are joined with union-find over the addresses they touch, so
+    bins can be applied in any order (or concurrently) with the same result.
+    Bins are ordered by their first transaction and keep block order inside.
+    """
+    parent: Dict[str, str] = {}
+    
+    def find(address: str) -> str:
+        root = parent.setdefault(address, address)
+        while root != parent[root]:
+            parent[root] = parent[parent[root]]
+            root = parent[root]
+        return root
+    
+    for transaction in transactions:
+        sender_root = find(transaction['sender'])
+        recipient_root = find(transaction['recipient'])
+        if sender_root != recipient_root:
+            parent[recipient_root] = sender_root
+    
+    bins: Dict[str, List[int]] = {}
+    for i, transaction in enumerate(transactions):
+        bins.setdefault(find(transaction['sender']), []).append(i)
+    return list(bins.values())
+
+
+def _replay_balances(transactions, balances: Dict[str, float]) -> Dict[str, float]:
+    """Replay transactions in order and return the new balances of the addresses they touch
+    
+    ``balances`` is only read, so disjoint bins can be replayed concurrently.
+    """
+    updated: Dict[str, float] = {}
+    for transaction in transactions:
+        sender = transaction['sender']
+        recipient = transaction['recipient']
+        amount = transaction['amount']
+        updated[sender] = updated.get(sender, balances.get(sender, 0.0)) - amount
+        updated[recipient] = updated.get(recipient, balances.get(recipient, 0.0)) + amount
+    return updated
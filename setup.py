@@ -46,6 +46,12 @@ setup(
         "cryptography>=3.0",
     ],
     extras_require={
+        "speedups": [
+            "orjson>=3.6",
+        ],
+        "msgpack": [
+            "msgpack>=1.0",
+        ],
         "dev": [
             "pytest>=6.0",
             "black>=21.0",
@@ -10,7 +10,7 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from src.core.hyperledger_integrated_db import HyperledgerIntegratedDB, DataField
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Tuple, Union
 import json
 import time
 
@@ -49,6 +49,19 @@ class HyperledgerAPI:
         """
         return self.db.add_data(model_name, data)
     
+    def add_records(self, model_name: str, records: List[Dict[str, Any]]) -> List[str]:
+        """
+        Add a batch of records to a model
+        
+        Args:
+            model_name: Name of the model to add records to
+            records: Record data dictionaries
+        
+        Returns:
+            list: IDs of the created records, empty if any record is invalid
+        """
+        return self.db.add_data_many(model_name, records)
+    
     def update_record(self, record_id: str, data: Dict[str, Any]) -> bool:
         """
         Update an existing record
@@ -74,18 +87,45 @@ class HyperledgerAPI:
         """
         return self.db.get_data(record_id)
     
-    def search_records(self, model_name: str = None, criteria: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    def get_records(self, record_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get several records by ID in one lookup
+        
+        Args:
+            record_ids: IDs of the records to retrieve
+        
+        Returns:
+            list: Records found, in the order of record_ids
+        """
+        return self.db.get_data_many(record_ids)
+    
+    def search_records(self, model_name: str = None, criteria: Dict[str, Any] = None,
+                       limit: int = None) -> List[Dict[str, Any]]:
         """
         Search for records based on criteria
         
         Args:
             model_name: Optional model name to filter by
             criteria: Search criteria dictionary
+            limit: Optional maximum number of records to return
         
         Returns:
             list: List of matching records
         """
-        return self.db.search_data(model_name, criteria)
+        return self.db.search_data(model_name, criteria, limit)
+    
+    def search_records_many(self, searches: Dict[str, Tuple[Optional[str], Dict[str, Any]]]
+                            ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Run several searches in one database query
+        
+        Args:
+            searches: (model_name, criteria) pairs keyed by a caller-chosen tag
+        
+        Returns:
+            dict: Matching records for each tag
+        """
+        return self.db.search_data_many(searches)
     
     def get_all_records(self, model_name: str = None) -> List[Dict[str, Any]]:
         """
@@ -99,6 +139,18 @@ class HyperledgerAPI:
         """
         return self.db.get_all_data(model_name)
     
+    def count_records(self, model_name: str = None) -> int:
+        """
+        Count records, optionally filtered by model
+        
+        Args:
+            model_name: Optional model name to filter by
+        
+        Returns:
+            int: Number of records
+        """
+        return self.db.count_data(model_name)
+    
     def get_models(self) -> List[Dict[str, Any]]:
         """
         Get all data models
@@ -117,6 +169,30 @@ class HyperledgerAPI:
         """
         return self.db.mine_block()
     
+    def verify_record(self, record_id: str) -> bool:
+        """
+        Verify that a record's creation is included in a mined block
+        
+        Args:
+            record_id: ID of the record to verify
+        
+        Returns:
+            bool: True if the record's Merkle proof matches its block, False otherwise
+        """
+        return self.db.verify_record_inclusion(record_id)
+    
+    def get_proof(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the Merkle inclusion proof of a mined transaction
+        
+        Args:
+            transaction_id: Blockchain transaction ID of a record
+        
+        Returns:
+            dict: Leaf hash, sibling path and block Merkle root, None if not mined
+        """
+        return self.db.get_proof(transaction_id)
+    
     def get_blockchain_info(self) -> Dict[str, Any]:
         """
         Get blockchain information
@@ -128,10 +204,11 @@ class HyperledgerAPI:
     
     def export_data(self, filepath: str) -> bool:
         """
-        Export all data to JSON file
+        Export all data to a file
         
         Args:
-            filepath: Path to export file
+            filepath: Path to export file. ``.ndjson``/``.jsonl`` and ``.msgpack``
+                paths are streamed one item per entry; anything else is JSON
         
         Returns:
             bool: True if successful, False otherwise
@@ -238,12 +315,12 @@ class HyperledgerAPI:
     
     def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         """Get user by username"""
-        users = self.search_records("User", {'username': username})
+        users = self.search_records("User", {'username': username}, limit=1)
         return users[0] if users else None
     
     def get_product_by_name(self, name: str) -> Optional[Dict[str, Any]]:
         """Get product by name"""
-        products = self.search_records("Product", {'name': name})
+        products = self.search_records("Product", {'name': name}, limit=1)
         return products[0] if products else None
     
     def update_user_status(self, user_id: str, is_active: bool) -> bool:
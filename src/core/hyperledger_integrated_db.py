@@ -1,12 +1,369 @@
+import copy
+import itertools
 import json
+import math
+import os
+import re
 import sqlite3
+import threading
 import time
-import uuid
+import weakref
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, Iterator, Tuple, Callable, TYPE_CHECKING
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, asdict
-from blockchain import Blockchain, Block
+from dataclasses import dataclass
+
+# The blockchain module (hashing, proof of work, process pools) is imported
+# where it is first used, so importing this module for its schema classes
+# stays cheap
+if TYPE_CHECKING:
+    from blockchain import Blockchain, Block
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup; fall back to stdlib json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # only needed for .msgpack exports
+    msgpack = None
+
+
+# Values of these exact types are encoded the same way by orjson and by the
+# json.dumps calls that hash blocks; floats must also be finite, since orjson
+# writes NaN and Infinity as null
+_PLAIN_JSON_SCALARS = (str, int, bool, type(None))
+
+
+def _is_plain_json(value: Any) -> bool:
+    """Check that a value holds only JSON types, string keys and finite floats"""
+    value_type = type(value)
+    if value_type in _PLAIN_JSON_SCALARS:
+        return True
+    if value_type is float:
+        return math.isfinite(value)
+    if value_type is dict:
+        return all(type(key) is str and _is_plain_json(item) for key, item in value.items())
+    if value_type is list or value_type is tuple:
+        return all(_is_plain_json(item) for item in value)
+    return False
+
+
+def _json_dumps_strict(value: Any) -> str:
+    """Serialize a value with json.dumps, rejecting what block hashing cannot encode
+    
+    Non-finite floats are rejected too: json_extract and the field indexes
+    cannot read NaN or Infinity.
+    """
+    return json.dumps(value, allow_nan=False)
+
+
+def _json_blob_strict(value: Any) -> bytes:
+    """Serialize a value with the sorted-key encoding block hashes use"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), allow_nan=False).encode()
+
+
+def _canonical_json(value: Any) -> str:
+    """Encode a value as the sorted-key compact JSON that block hashes cover"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+
+if orjson is not None:
+    # orjson decodes integers outside the 64-bit range as floats. Those take at
+    # least 19 digits, so text with such a run is decoded by json.loads instead
+    _WIDE_INTEGER = re.compile(r'\d{19}')
+    _WIDE_INTEGER_BYTES = re.compile(rb'\d{19}')
+    
+    def _json_dumps(value: Any) -> str:
+        """Serialize a value for a TEXT column"""
+        if _is_plain_json(value):
+            try:
+                return orjson.dumps(value).decode()
+            except TypeError:
+                # Integers wider than 64 bits
+                pass
+        return _json_dumps_strict(value)
+    
+    def _json_blob(value: Any) -> bytes:
+        """Serialize a value for a BLOB column that SQL never reads into"""
+        if _is_plain_json(value):
+            try:
+                return orjson.dumps(value)
+            except TypeError:
+                pass
+        return _json_blob_strict(value)
+    
+    def _json_loads(text: Union[str, bytes]) -> Any:
+        """Deserialize a JSON column written by _json_dumps, _json_blob or json.dumps"""
+        if (_WIDE_INTEGER_BYTES if isinstance(text, bytes) else _WIDE_INTEGER).search(text):
+            return json.loads(text)
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # Rows written with json.dumps may hold NaN/Infinity, which orjson rejects
+            return json.loads(text)
+else:
+    _json_dumps, _json_blob, _json_loads = _json_dumps_strict, _json_blob_strict, json.loads
+
+
+# Record fields that search_data can address with a literal json_extract path
+_JSON_FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _sql_literal(text: str) -> str:
+    """Quote a string as a SQL literal"""
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _criterion_sql(key: str, value: Any) -> Optional[Tuple[str, Tuple[Any, ...]]]:
+    """Translate one search criterion into a SQL clause, or None if it must be checked in Python"""
+    if not _JSON_FIELD_NAME.match(key):
+        return None
+    path = f"'$.{key}'"
+    
+    if value is None:
+        return f"json_type(data, {path}) = 'null'", ()
+    if isinstance(value, str):
+        # LIKE folds ASCII case only, which matches str.lower() for ASCII needles
+        if not value.isascii():
+            return None
+        pattern = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return (f"json_type(data, {path}) = 'text' AND json_extract(data, {path}) LIKE ? ESCAPE '\\'",
+                (f'%{pattern}%',))
+    if isinstance(value, float) or (isinstance(value, int) and -2**63 <= value < 2**63):
+        # JSON true/false extract as 1/0, so this keeps Python's True == 1 equality
+        return f"json_extract(data, {path}) = ?", (value,)
+    return None
+
+
+def _matches_criteria(record_data: Dict[str, Any], criteria: Dict[str, Any]) -> bool:
+    """Check search criteria against decoded record data"""
+    for key, value in criteria.items():
+        if key not in record_data:
+            return False
+        
+        if isinstance(value, str) and isinstance(record_data[key], str):
+            if value.lower() not in record_data[key].lower():
+                return False
+        elif record_data[key] != value:
+            return False
+    
+    return True
+
+
+# Applied to every connection: WAL lets readers run alongside the writer, and
+# synchronous=NORMAL only fsyncs at checkpoints, which in WAL mode can lose the
+# last commits on power failure but never corrupts the database
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA mmap_size=268435456',
+)
+
+# Field type -> (check on `value`, error message) compiled into model validators.
+# Booleans are not accepted as integers even though bool subclasses int
+TYPE_VALIDATORS: Dict[str, Tuple[str, str]] = {
+    'text': ("isinstance(value, str)", "must be a string"),
+    'integer': ("isinstance(value, int) and not isinstance(value, bool)", "must be an integer"),
+    'real': ("isinstance(value, (int, float))", "must be a number"),
+    'boolean': ("isinstance(value, bool)", "must be a boolean"),
+    # Accept timestamp or datetime string
+    'datetime': ("isinstance(value, (int, float, str))", "must be a datetime"),
+    'json': ("isinstance(value, (dict, list))", "must be a JSON object or array"),
+}
+
+
+def _compile_validator(fields: List['DataField']) -> Callable[[Dict[str, Any]], None]:
+    """Generate a validator for one schema with every field check written out
+    
+    The generated function checks that required fields are present, then
+    fills in defaults and checks types in field order, with the field names,
+    defaults and type checks written in as constants rather than looked up
+    per record.
+    """
+    namespace: Dict[str, Any] = {'deepcopy': copy.deepcopy}
+    lines = ["def validate(data):"]
+    for field in fields:
+        if field.required:
+            lines.append(f"    if {field.name!r} not in data:")
+            lines.append(f"        raise ValueError({f'Required field {field.name!r} is missing'!r})")
+    
+    for i, field in enumerate(fields):
+        check = TYPE_VALIDATORS.get(field.type)
+        if field.default is not None:
+            namespace[f'default_{i}'] = field.default
+            # Each record gets its own copy of a mutable default
+            fill = f"deepcopy(default_{i})" if isinstance(field.default, (dict, list)) else f"default_{i}"
+            lines.append(f"    if {field.name!r} not in data:")
+            lines.append(f"        data[{field.name!r}] = {fill}")
+        if check and (field.required or field.default is not None):
+            # Present by now, so there is no membership test to repeat
+            lines.append(f"    value = data[{field.name!r}]")
+            lines.append(f"    if not ({check[0]}):")
+            lines.append(f"        raise ValueError({f'Field {field.name!r} {check[1]}'!r})")
+        elif check:
+            lines.append(f"    if {field.name!r} in data:")
+            lines.append(f"        value = data[{field.name!r}]")
+            lines.append(f"        if not ({check[0]}):")
+            lines.append(f"            raise ValueError({f'Field {field.name!r} {check[1]}'!r})")
+    lines.append("    return None")
+    
+    exec(compile("\n".join(lines), "<validator>", "exec"), namespace)
+    return namespace['validate']
+
+
+# Field types that create_data_model indexes for search_data. Text criteria
+# match substrings, which a B-tree cannot serve, and json values are not
+# compared in SQL, so only fields searched by equality are indexed
+INDEXED_FIELD_TYPES = ('integer', 'real', 'boolean', 'datetime')
+
+# data_records columns in the order record reads select them. Rows come back
+# as RecordRow tuples, so column access is a tuple index rather than a name lookup
+RecordRow = namedtuple('RecordRow', [
+    'id', 'model_name', 'data', 'created_at', 'updated_at',
+    'blockchain_transaction_id', 'blockchain_block_index'
+])
+_SELECT_RECORDS = f"SELECT {', '.join(RecordRow._fields)} FROM data_records"
+
+
+def _record_row_factory(cursor: sqlite3.Cursor, row: tuple) -> RecordRow:
+    """sqlite3 row factory for queries built on _SELECT_RECORDS"""
+    return RecordRow._make(row)
+
+
+# Statements run by the write and read paths, built once at import so each call
+# passes the same string to the connection's statement cache
+_SELECT_RECORD_BY_ID = f'{_SELECT_RECORDS} WHERE id = ?'
+_SELECT_MODEL_RECORDS = f'{_SELECT_RECORDS} WHERE model_name = ? ORDER BY created_at'
+_SELECT_ALL_RECORDS = f'{_SELECT_RECORDS} ORDER BY created_at'
+_INSERT_DATA_MODEL = '''
+    INSERT INTO data_models (name, schema_data, created_at, version)
+    VALUES (?, ?, ?, ?)
+'''
+_INSERT_RECORD = '''
+    INSERT INTO data_records (id, model_name, data, created_at, updated_at, blockchain_transaction_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+_SELECT_RECORD_DATA = 'SELECT model_name, data FROM data_records WHERE id = ?'
+# UPDATE ... RETURNING needs SQLite 3.35; without it updated rows are re-read
+# from the database on their next get_data
+_UPDATE_RECORD_DATA = '''
+    UPDATE data_records
+    SET data = ?, updated_at = ?
+    WHERE id = ?
+''' + (f"    RETURNING {', '.join(RecordRow._fields)}\n" if sqlite3.sqlite_version_info >= (3, 35) else '')
+_INSERT_TRANSACTION = '''
+    INSERT INTO blockchain_transactions (id, transaction_type, data_id, model_name, transaction_data, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+_INSERT_BLOCK = '''
+    INSERT INTO blockchain_blocks (block_index, hash, previous_hash, timestamp, nonce, transactions_data, version, merkle_root)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+_SET_TRANSACTION_BLOCK = '''
+    UPDATE blockchain_transactions
+    SET block_index = ?
+    WHERE id = ?
+'''
+_SET_RECORD_BLOCK = '''
+    UPDATE data_records
+    SET blockchain_block_index = ?
+    WHERE id = ?
+'''
+_INSERT_MERKLE_PROOF = '''
+    INSERT INTO merkle_proofs (transaction_id, block_index, leaf_index, leaf_hash, proof)
+    VALUES (?, ?, ?, ?, ?)
+'''
+_SELECT_PROOFS = '''
+    SELECT p.transaction_id, p.block_index, p.leaf_index, p.leaf_hash, p.proof, b.merkle_root
+    FROM merkle_proofs p
+    JOIN blockchain_blocks b ON b.block_index = p.block_index
+'''
+_SELECT_PROOF_BY_TRANSACTION = _SELECT_PROOFS + 'WHERE p.transaction_id = ?'
+_SELECT_PROOF_RECORD = 'SELECT model_name, data, blockchain_transaction_id FROM data_records WHERE id = ?'
+# The latest add_data or update_data transaction of a record. Records created by
+# add_data_many have none until they are first updated
+_SELECT_LAST_RECORD_WRITE = '''
+    SELECT id FROM blockchain_transactions
+    WHERE data_id = ?
+    ORDER BY timestamp DESC
+    LIMIT 1
+'''
+_SELECT_RECORD_UPDATES = '''
+    SELECT data_id, transaction_data FROM blockchain_transactions
+    WHERE transaction_type = 'data_update' AND data_id IN ({})
+    ORDER BY timestamp DESC
+'''
+
+# Compiled statements kept per connection (the sqlite3 default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+
+def _dumps_export(value: Any) -> bytes:
+    """Serialize an exported object to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=str).encode()
+
+
+def _record_json(row: RecordRow) -> bytes:
+    """Encode a data_records row as a JSON object, copying its stored payload verbatim"""
+    fields = row._asdict()
+    del fields['data']
+    return b'{"data": ' + row.data.encode() + b', ' + _dumps_export(fields)[1:]
+
+
+# Rows fetched per round trip when loading the chain at startup
+LOAD_BATCH_SIZE = 1000
+
+# Number of records get_data keeps in memory
+RECORD_CACHE_SIZE = 4096
+
+# Seconds between checks for commits by other connections, which invalidate
+# the get_data cache; until the next check, cached rows may be that stale
+RECORD_CACHE_CHECK_INTERVAL = 0.1
+
+# Ids bound per SELECT ... WHERE id IN (...) in get_data_many, well under
+# SQLite's host parameter limit (999 before SQLite 3.32)
+ID_LOOKUP_BATCH_SIZE = 500
+
+# Record and transaction ids generated per os.urandom call
+ID_POOL_SIZE = 1024
+
+# Export formats written one item at a time instead of as a single document
+STREAMING_EXPORT_FORMATS = ('.ndjson', '.jsonl', '.msgpack')
+
+# Databases opened through HyperledgerIntegratedDB.open, by absolute path and
+# difficulty, until they are disconnected
+_OPEN_DATABASES: Dict[Tuple[str, int], 'HyperledgerIntegratedDB'] = {}
+_OPEN_DATABASES_LOCK = threading.Lock()
+
+
+class _ThreadReaders:
+    """One thread's read connections: the lookup connection and idle streaming ones"""
+    
+    __slots__ = ('connection', 'lookup_cursor', 'idle', 'opened', '__weakref__')
+    
+    def __init__(self):
+        self.connection: Optional[sqlite3.Connection] = None
+        self.lookup_cursor: Optional[sqlite3.Cursor] = None
+        self.idle: List[sqlite3.Connection] = []
+        self.opened: List[sqlite3.Connection] = []
+
+
+def _close_thread_readers(registry: List[sqlite3.Connection], lock: threading.Lock,
+                          opened: List[sqlite3.Connection]) -> None:
+    """Close the read connections of a thread that has exited"""
+    with lock:
+        for connection in opened:
+            connection.close()
+            if connection in registry:
+                registry.remove(connection)
 
 
 @dataclass
@@ -17,6 +374,16 @@ class DataField:
     required: bool = True
     default: Any = None
     description: str = ""
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for schema storage"""
+        return {
+            'name': self.name,
+            'type': self.type,
+            'required': self.required,
+            'default': self.default,
+            'description': self.description
+        }
 
 
 @dataclass
@@ -31,16 +398,25 @@ class DataModel:
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = time.time()
+        self._validator = _compile_validator(self.fields)
+        self._dict_cache: Optional[Dict[str, Any]] = None
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for blockchain storage"""
-        return {
-            'name': self.name,
-            'fields': [asdict(field) for field in self.fields],
-            'description': self.description,
-            'created_at': self.created_at,
-            'version': self.version
-        }
+        """Convert to dictionary for blockchain storage
+        
+        Schemas do not change after creation, so the conversion is done once;
+        each call returns fresh top-level and field dicts that callers may edit.
+        """
+        if self._dict_cache is None:
+            self._dict_cache = {
+                'name': self.name,
+                'fields': [field.to_dict() for field in self.fields],
+                'description': self.description,
+                'created_at': self.created_at,
+                'version': self.version
+            }
+        cached = self._dict_cache
+        return {**cached, 'fields': [dict(field) for field in cached['fields']]}
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'DataModel':
@@ -58,105 +434,288 @@ class DataModel:
 class HyperledgerIntegratedDB:
     """Database system with integrated blockchain storage, inspired by Hyperledger Fabric"""
     
-    def __init__(self, db_path: str = "hyperledger_integrated.db", blockchain_difficulty: int = 2):
+    def __init__(self, db_path: str = "hyperledger_integrated.db", blockchain_difficulty: int = 2,
+                 blockchain_factory: Optional[Callable[..., 'Blockchain']] = None):
         self.db_path = db_path
+        # All writes go through self.connection while holding _write_lock;
+        # reads use a connection per thread (see _read_connection)
         self.connection = None
-        self.blockchain = Blockchain(difficulty=blockchain_difficulty)
+        self._write_cursor = None
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._read_connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # blockchain_factory lets callers supply another Blockchain implementation;
+        # it is called with the difficulty keyword
+        if blockchain_factory is None:
+            from blockchain import Blockchain as blockchain_factory
+        self.blockchain = blockchain_factory(difficulty=blockchain_difficulty)
         self.data_models: Dict[str, DataModel] = {}
+        # Recently used data_records rows by id, least recently used first. The
+        # data column stays as stored JSON so every caller decodes its own copy
+        self._record_cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Bumped by every write to the cache, so a reader does not cache a row
+        # it fetched before a concurrent write changed it
+        self._cache_generation = 0
+        # Writer's PRAGMA data_version as of the last cache check, and when that was
+        self._data_version: Optional[int] = None
+        self._cache_checked_at = 0.0
+        self._id_pool: List[str] = []
         self.setup_database()
         self._load_existing_data()
     
+    @classmethod
+    def open(cls, db_path: str = "hyperledger_integrated.db",
+             blockchain_difficulty: int = 2) -> 'HyperledgerIntegratedDB':
+        """Get the process-wide database for a path, opening it on first use
+        
+        Later calls with the same path and difficulty return the same
+        instance, with its connections, caches and loaded chain, until it is
+        disconnected. In-memory databases are private to their instance, so
+        each call opens a new one.
+        """
+        if db_path == ':memory:':
+            return cls(db_path, blockchain_difficulty)
+        key = (os.path.abspath(db_path), blockchain_difficulty)
+        with _OPEN_DATABASES_LOCK:
+            db = _OPEN_DATABASES.get(key)
+            if db is None:
+                db = _OPEN_DATABASES[key] = cls(db_path, blockchain_difficulty)
+            return db
+    
     def setup_database(self) -> None:
         """Create database tables"""
         self.connect()
+        with self._transaction() as cursor:
+            # JSON that SQL never reads into is stored as BLOB, skipping UTF-8
+            # encoding on write and decoding on read. data_records.data stays
+            # TEXT because search_data and its indexes query it with json_extract.
+            # Older databases keep their TEXT declarations; _json_loads reads both
+            
+            # Create data models table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS data_models (
+                    name TEXT PRIMARY KEY,
+                    schema_data BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    version TEXT NOT NULL
+                )
+            ''')
+            
+            # Create data records table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS data_records (
+                    id TEXT PRIMARY KEY,
+                    model_name TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    blockchain_transaction_id TEXT,
+                    blockchain_block_index INTEGER,
+                    FOREIGN KEY (model_name) REFERENCES data_models (name)
+                )
+            ''')
+            
+            # Create blockchain transactions table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS blockchain_transactions (
+                    id TEXT PRIMARY KEY,
+                    transaction_type TEXT NOT NULL,
+                    data_id TEXT,
+                    model_name TEXT,
+                    transaction_data BLOB NOT NULL,
+                    timestamp REAL NOT NULL,
+                    block_index INTEGER,
+                    FOREIGN KEY (data_id) REFERENCES data_records (id)
+                )
+            ''')
+            
+            # Create blockchain blocks table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS blockchain_blocks (
+                    block_index INTEGER PRIMARY KEY,
+                    hash TEXT NOT NULL,
+                    previous_hash TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    nonce INTEGER NOT NULL,
+                    transactions_data BLOB,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    version INTEGER NOT NULL DEFAULT 1,
+                    merkle_root TEXT
+                )
+            ''')
+            
+            # Blocks persisted before hash layouts were versioned use version 1
+            self._ensure_column('blockchain_blocks', 'version', 'INTEGER NOT NULL DEFAULT 1')
+            # Only version 3 blocks have a Merkle root
+            self._ensure_column('blockchain_blocks', 'merkle_root', 'TEXT')
+            
+            # Create Merkle inclusion proofs table, one row per mined transaction
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS merkle_proofs (
+                    transaction_id TEXT PRIMARY KEY,
+                    block_index INTEGER NOT NULL,
+                    leaf_index INTEGER NOT NULL,
+                    leaf_hash TEXT NOT NULL,
+                    proof BLOB NOT NULL,
+                    FOREIGN KEY (transaction_id) REFERENCES blockchain_transactions (id)
+                )
+            ''')
+            
+            # Indexes for the model filter (which also serves ORDER BY created_at)
+            # and for transaction lookups by record and by block
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_records_model ON data_records(model_name, created_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tx_data ON blockchain_transactions(data_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tx_block ON blockchain_transactions(block_index)')
+    
+    def _ensure_column(self, table: str, column: str, definition: str) -> None:
+        """Add a column to a table created by an older version of the schema"""
         cursor = self.connection.cursor()
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in {row['name'] for row in cursor.fetchall()}:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    
+    def connect(self) -> None:
+        """Establish the writer database connection
         
-        # Create data models table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS data_models (
-                name TEXT PRIMARY KEY,
-                schema_data TEXT NOT NULL,
-                created_at REAL NOT NULL,
-                version TEXT NOT NULL
-            )
-        ''')
-        
-        # Create data records table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS data_records (
-                id TEXT PRIMARY KEY,
-                model_name TEXT NOT NULL,
-                data TEXT NOT NULL,
-                created_at REAL NOT NULL,
-                updated_at REAL NOT NULL,
-                blockchain_transaction_id TEXT,
-                blockchain_block_index INTEGER,
-                FOREIGN KEY (model_name) REFERENCES data_models (name)
-            )
-        ''')
-        
-        # Create blockchain transactions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS blockchain_transactions (
-                id TEXT PRIMARY KEY,
-                transaction_type TEXT NOT NULL,
-                data_id TEXT,
-                model_name TEXT,
-                transaction_data TEXT NOT NULL,
-                timestamp REAL NOT NULL,
-                block_index INTEGER,
-                FOREIGN KEY (data_id) REFERENCES data_records (id)
-            )
-        ''')
-        
-        # Create blockchain blocks table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS blockchain_blocks (
-                block_index INTEGER PRIMARY KEY,
-                hash TEXT NOT NULL,
-                previous_hash TEXT NOT NULL,
-                timestamp REAL NOT NULL,
-                nonce INTEGER NOT NULL,
-                transactions_data TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        The connection runs in autocommit mode; writes are grouped explicitly
+        with _transaction.
+        """
+        self.connection = self._open_connection()
+        self._write_cursor = self.connection.cursor()
+        self._data_version = self._writer_data_version()
+    
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a connection with the shared pragmas
         
-        self.connection.commit()
+        check_same_thread is off because the writer connection is shared under
+        _write_lock and disconnect closes every thread's read connection; a
+        read connection is otherwise only used by the thread that opened it.
+        """
+        connection = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        connection.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            connection.execute(pragma)
+        return connection
     
-    def connect(self) -> None:
-        """Establish database connection"""
-        self.connection = sqlite3.connect(self.db_path)
-        self.connection.row_factory = sqlite3.Row
+    def _read_connection(self) -> sqlite3.Connection:
+        """Get this thread's read-only connection, opening it on first use
+        
+        Under WAL, readers on their own connections run concurrently with each
+        other and with the writer. An in-memory database only exists on the
+        writer connection, so it is read through that one. Statements on this
+        connection must be finished before the call that ran them returns;
+        lazy reads use _streaming_connection.
+        """
+        if self.db_path == ':memory:':
+            return self.connection
+        readers = self._thread_readers()
+        if readers.connection is None:
+            readers.connection = self._open_read_connection(readers)
+        return readers.connection
+    
+    @contextmanager
+    def _streaming_connection(self) -> Iterator[sqlite3.Connection]:
+        """Lend this thread a read connection for a read whose rows are handed out lazily"""
+        # An unfinished statement pins its connection to an old WAL snapshot,
+        # so lazy reads stay off the connection get_data reads and caches from
+        if self.db_path == ':memory:':
+            yield self.connection
+            return
+        readers = self._thread_readers()
+        connection = readers.idle.pop() if readers.idle else self._open_read_connection(readers)
+        try:
+            yield connection
+        finally:
+            readers.idle.append(connection)
+    
+    def _thread_readers(self) -> _ThreadReaders:
+        """Get this thread's read connections, which are closed when the thread exits"""
+        readers = getattr(self._local, 'readers', None)
+        if readers is None:
+            readers = self._local.readers = _ThreadReaders()
+            # The thread-local holder is dropped when its thread ends, running the finalizer
+            weakref.finalize(readers, _close_thread_readers,
+                             self._read_connections, self._connections_lock, readers.opened)
+        return readers
+    
+    def _open_read_connection(self, readers: _ThreadReaders) -> sqlite3.Connection:
+        """Open a query-only connection owned by the calling thread"""
+        connection = self._open_connection()
+        connection.execute('PRAGMA query_only=ON')
+        readers.opened.append(connection)
+        with self._connections_lock:
+            self._read_connections.append(connection)
+        return connection
+    
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Run the enclosed statements in one write transaction on the writer cursor, rolling back on error"""
+        with self._write_lock:
+            cursor = self._write_cursor
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
     
     def disconnect(self) -> None:
-        """Close database connection"""
+        """Close the writer and every thread's read connection"""
+        with _OPEN_DATABASES_LOCK:
+            for key, db in list(_OPEN_DATABASES.items()):
+                if db is self:
+                    del _OPEN_DATABASES[key]
+        with self._connections_lock:
+            for connection in self._read_connections:
+                connection.close()
+            # Cleared in place: thread finalizers hold this list
+            self._read_connections.clear()
+            local, self._local = self._local, threading.local()
+        # Dropping the old thread-local data runs finalizers that take the lock
+        del local
         if self.connection:
             self.connection.close()
     
     def _load_existing_data(self) -> None:
         """Load existing data models and blockchain data"""
+        from blockchain import Block
+        
         try:
             # Load data models
             cursor = self.connection.cursor()
+            cursor.arraysize = LOAD_BATCH_SIZE
             cursor.execute('SELECT * FROM data_models')
-            for row in cursor.fetchall():
-                schema_data = json.loads(row['schema_data'])
+            for row in cursor:
+                schema_data = _json_loads(row['schema_data'])
                 self.data_models[row['name']] = DataModel.from_dict(schema_data)
             
-            # Load blockchain data
+            # Load blockchain data in batches, keeping the stored hashes rather
+            # than rehashing every block up front
             cursor.execute('SELECT * FROM blockchain_blocks ORDER BY block_index')
-            for row in cursor.fetchall():
-                transactions = json.loads(row['transactions_data']) if row['transactions_data'] else []
-                block = Block(
-                    index=row['block_index'],
-                    transactions=transactions,
-                    timestamp=row['timestamp'],
-                    previous_hash=row['previous_hash'],
-                    nonce=row['nonce']
-                )
-                block.hash = row['hash']
-                self.blockchain.chain.append(block)
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                for row in rows:
+                    transactions = _json_loads(row['transactions_data']) if row['transactions_data'] else []
+                    block = Block.restore(
+                        index=row['block_index'],
+                        transactions=transactions,
+                        timestamp=row['timestamp'],
+                        previous_hash=row['previous_hash'],
+                        nonce=row['nonce'],
+                        block_hash=row['hash'],
+                        version=row['version']
+                    )
+                    self.blockchain.add_block(block)
             
             print(f"Loaded {len(self.data_models)} data models and {len(self.blockchain.chain)} blockchain blocks")
         except Exception as e:
@@ -183,32 +742,36 @@ class HyperledgerIntegratedDB:
                 description=description
             )
             
-            # Save to database
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                INSERT INTO data_models (name, schema_data, created_at, version)
-                VALUES (?, ?, ?, ?)
-            ''', (
-                name,
-                json.dumps(data_model.to_dict()),
-                data_model.created_at,
-                data_model.version
-            ))
-            
-            # Store in memory
-            self.data_models[name] = data_model
+            # The same schema dict is stored and recorded on the blockchain
+            schema = data_model.to_dict()
             
-            # Add to blockchain
-            self._add_to_blockchain(
-                transaction_type="model_creation",
-                data={
-                    'model_name': name,
-                    'schema': data_model.to_dict(),
-                    'description': description
-                }
-            )
+            # Save to database
+            with self._transaction() as cursor:
+                cursor.execute(_INSERT_DATA_MODEL, (
+                    name,
+                    _json_blob(schema),
+                    data_model.created_at,
+                    data_model.version
+                ))
+                
+                # Index the model's equality-searchable fields
+                for field in data_fields:
+                    if field.type in INDEXED_FIELD_TYPES and _JSON_FIELD_NAME.match(field.name):
+                        self._create_field_index(cursor, field.name, name)
+                
+                # Store in memory
+                self.data_models[name] = data_model
+                
+                # Add to blockchain
+                self._add_to_blockchain(
+                    transaction_type="model_creation",
+                    data={
+                        'model_name': name,
+                        'schema': schema,
+                        'description': description
+                    }
+                )
             
-            self.connection.commit()
             print(f"Data model '{name}' created successfully")
             return True
             
@@ -228,24 +791,13 @@ class HyperledgerIntegratedDB:
             self._validate_data(data, data_model)
             
             # Generate unique ID
-            record_id = str(uuid.uuid4())
+            record_id = self._new_id()
             current_time = time.time()
+            data_json = _json_dumps(data)
             
-            # Save to database
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                INSERT INTO data_records (id, model_name, data, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                record_id,
-                model_name,
-                json.dumps(data),
-                current_time,
-                current_time
-            ))
-            
-            # Add to blockchain
-            transaction_id = self._add_to_blockchain(
+            # The transaction id is generated up front so the record is
+            # written complete in a single INSERT
+            transaction = self._build_transaction(
                 transaction_type="data_creation",
                 data={
                     'record_id': record_id,
@@ -254,15 +806,23 @@ class HyperledgerIntegratedDB:
                     'created_at': current_time
                 }
             )
+            transaction_id = transaction['id']
             
-            # Update record with blockchain info
-            cursor.execute('''
-                UPDATE data_records 
-                SET blockchain_transaction_id = ?
-                WHERE id = ?
-            ''', (transaction_id, record_id))
+            # Save to database and add to blockchain
+            with self._transaction() as cursor:
+                cursor.execute(_INSERT_RECORD, (
+                    record_id,
+                    model_name,
+                    data_json,
+                    current_time,
+                    current_time,
+                    transaction_id
+                ))
+                self._record_transaction(cursor, transaction)
             
-            self.connection.commit()
+            self._cache_record(RecordRow(
+                record_id, model_name, data_json, current_time, current_time, transaction_id, None
+            ))
             print(f"Data added to model '{model_name}' with ID: {record_id}")
             return record_id
             
@@ -270,49 +830,117 @@ class HyperledgerIntegratedDB:
             print(f"Error adding data: {e}")
             return None
     
-    def update_data(self, record_id: str, data: Dict[str, Any]) -> bool:
-        """Update existing data"""
+    def add_data_many(self, model_name: str, records: List[Dict[str, Any]]) -> List[str]:
+        """Add a batch of records to a model in one database transaction
+        
+        Every record is validated before anything is written, so one invalid
+        record rejects the whole batch. The batch is logged as a single
+        blockchain transaction that commits to the Merkle root of its records,
+        instead of one transaction per record. Returns the new record ids in
+        input order, or an empty list on failure.
+        """
+        from blockchain import merkle_leaf, merkle_root
+        
         try:
-            # Get current record
-            cursor = self.connection.cursor()
-            cursor.execute('SELECT * FROM data_records WHERE id = ?', (record_id,))
-            row = cursor.fetchone()
-            
-            if not row:
-                raise ValueError(f"Record with ID '{record_id}' not found")
-            
-            current_data = json.loads(row['data'])
-            model_name = row['model_name']
+            if model_name not in self.data_models:
+                raise ValueError(f"Data model '{model_name}' does not exist")
+            if not records:
+                return []
             
-            # Validate updated data
-            if model_name in self.data_models:
-                self._validate_data(data, self.data_models[model_name])
+            validate = self.data_models[model_name]._validator
+            for data in records:
+                validate(data)
             
-            # Update database
             current_time = time.time()
-            cursor.execute('''
-                UPDATE data_records 
-                SET data = ?, updated_at = ?
-                WHERE id = ?
-            ''', (
-                json.dumps(data),
-                current_time,
-                record_id
-            ))
+            record_ids = [self._new_id() for _ in records]
             
-            # Add to blockchain
-            self._add_to_blockchain(
-                transaction_type="data_update",
-                data={
+            # Leaves have the shape of an add_data transaction payload
+            leaves = [
+                merkle_leaf({
                     'record_id': record_id,
                     'model_name': model_name,
-                    'previous_data': current_data,
-                    'new_data': data,
-                    'updated_at': current_time
+                    'data': data,
+                    'created_at': current_time
+                })
+                for record_id, data in zip(record_ids, records)
+            ]
+            transaction = self._build_transaction(
+                transaction_type="data_batch_creation",
+                data={
+                    'model_name': model_name,
+                    'record_ids': record_ids,
+                    'records_root': merkle_root(leaves).hex(),
+                    'created_at': current_time
                 }
             )
+            rows = [
+                RecordRow(
+                    record_id, model_name, _json_dumps(data), current_time, current_time, transaction['id'], None
+                )
+                for record_id, data in zip(record_ids, records)
+            ]
+            
+            with self._transaction() as cursor:
+                cursor.executemany(_INSERT_RECORD, [row[:6] for row in rows])
+                self._record_transaction(cursor, transaction)
+            
+            for row in rows:
+                self._cache_record(row)
+            print(f"{len(rows)} records added to model '{model_name}'")
+            return record_ids
+            
+        except Exception as e:
+            print(f"Error adding data: {e}")
+            return []
+    
+    def update_data(self, record_id: str, data: Dict[str, Any]) -> bool:
+        """Update existing data"""
+        try:
+            # Read and rewrite the record in one transaction. Only the columns
+            # the blockchain payload needs are read back
+            with self._transaction() as cursor:
+                cursor.execute(_SELECT_RECORD_DATA, (record_id,))
+                row = cursor.fetchone()
+                
+                if not row:
+                    raise ValueError(f"Record with ID '{record_id}' not found")
+                
+                model_name, current_data = row[0], _json_loads(row[1])
+                
+                # Validate updated data
+                if model_name in self.data_models:
+                    self._validate_data(data, self.data_models[model_name])
+                
+                # Update database
+                current_time = time.time()
+                cursor.execute(_UPDATE_RECORD_DATA, (
+                    _json_dumps(data),
+                    current_time,
+                    record_id
+                ))
+                # The writer cursor is shared, so the RETURNING row is converted
+                # here rather than by changing the cursor's row factory
+                returned = cursor.fetchone()
+                updated = RecordRow._make(returned) if returned else None
+                
+                # Add to blockchain
+                self._add_to_blockchain(
+                    transaction_type="data_update",
+                    data={
+                        'record_id': record_id,
+                        'model_name': model_name,
+                        'previous_data': current_data,
+                        'new_data': data,
+                        'updated_at': current_time
+                    }
+                )
             
-            self.connection.commit()
+            if updated:
+                self._cache_record(updated)
+            else:
+                with self._cache_lock:
+                    self._cache_generation += 1
+                    self._record_cache.pop(record_id, None)
             print(f"Data updated for record: {record_id}")
             return True
             
@@ -323,53 +951,186 @@ class HyperledgerIntegratedDB:
     def get_data(self, record_id: str) -> Optional[Dict[str, Any]]:
         """Get data by record ID"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute('SELECT * FROM data_records WHERE id = ?', (record_id,))
+            self._check_record_cache()
+            with self._cache_lock:
+                cached = self._record_cache.get(record_id)
+                if cached is not None:
+                    self._record_cache.move_to_end(record_id)
+                generation = self._cache_generation
+            if cached is not None:
+                return self._record_from_row(cached)
+            
+            cursor = self._lookup_cursor()
+            cursor.execute(_SELECT_RECORD_BY_ID, (record_id,))
             row = cursor.fetchone()
             
             if row:
-                return {
-                    'id': row['id'],
-                    'model_name': row['model_name'],
-                    'data': json.loads(row['data']),
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at'],
-                    'blockchain_transaction_id': row['blockchain_transaction_id'],
-                    'blockchain_block_index': row['blockchain_block_index']
-                }
+                self._cache_record(row, generation)
+                return self._record_from_row(row)
             return None
             
         except Exception as e:
             print(f"Error retrieving data: {e}")
             return None
     
+    def get_data_many(self, record_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get several records by ID, in the order given
+        
+        Cached records are served from memory and the rest are read with one
+        ``WHERE id IN (...)`` query per ID_LOOKUP_BATCH_SIZE ids. IDs with no
+        record are skipped.
+        """
+        try:
+            self._check_record_cache()
+            rows: Dict[str, RecordRow] = {}
+            with self._cache_lock:
+                for record_id in record_ids:
+                    cached = self._record_cache.get(record_id)
+                    if cached is not None:
+                        self._record_cache.move_to_end(record_id)
+                        rows[record_id] = cached
+                generation = self._cache_generation
+            
+            missing = list(dict.fromkeys(record_id for record_id in record_ids if record_id not in rows))
+            cursor = self._lookup_cursor()
+            for start in range(0, len(missing), ID_LOOKUP_BATCH_SIZE):
+                batch = missing[start:start + ID_LOOKUP_BATCH_SIZE]
+                cursor.execute(f"{_SELECT_RECORDS} WHERE id IN ({', '.join('?' * len(batch))})", batch)
+                for row in cursor.fetchall():
+                    self._cache_record(row, generation)
+                    rows[row.id] = row
+            
+            return [self._record_from_row(rows[record_id]) for record_id in record_ids if record_id in rows]
+            
+        except Exception as e:
+            print(f"Error retrieving data: {e}")
+            return []
+    
     def get_all_data(self, model_name: str = None) -> List[Dict[str, Any]]:
         """Get all data records, optionally filtered by model"""
         try:
-            cursor = self.connection.cursor()
+            return list(self.iter_all_data(model_name))
+            
+        except Exception as e:
+            print(f"Error retrieving data: {e}")
+            return []
+    
+    def iter_all_data(self, model_name: str = None) -> Iterator[Dict[str, Any]]:
+        """Yield data records one at a time, optionally filtered by model
+        
+        Rows are read from the cursor as the caller consumes them, so stopping
+        early skips fetching and decoding the rest. Errors are raised rather
+        than printed.
+        """
+        with self._streaming_connection() as connection:
+            cursor = connection.cursor()
+            cursor.row_factory = _record_row_factory
             
             if model_name:
-                cursor.execute('SELECT * FROM data_records WHERE model_name = ? ORDER BY created_at', (model_name,))
+                cursor.execute(_SELECT_MODEL_RECORDS, (model_name,))
             else:
-                cursor.execute('SELECT * FROM data_records ORDER BY created_at')
+                cursor.execute(_SELECT_ALL_RECORDS)
             
-            records = []
-            for row in cursor.fetchall():
-                records.append({
-                    'id': row['id'],
-                    'model_name': row['model_name'],
-                    'data': json.loads(row['data']),
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at'],
-                    'blockchain_transaction_id': row['blockchain_transaction_id'],
-                    'blockchain_block_index': row['blockchain_block_index']
-                })
-            
-            return records
+            for row in cursor:
+                yield self._record_from_row(row)
+    
+    def count_data(self, model_name: str = None) -> int:
+        """Count data records, optionally filtered by model, without reading them"""
+        try:
+            cursor = self._read_connection().cursor()
+            if model_name:
+                cursor.execute('SELECT COUNT(*) FROM data_records WHERE model_name = ?', (model_name,))
+            else:
+                cursor.execute('SELECT COUNT(*) FROM data_records')
+            return cursor.fetchone()[0]
             
         except Exception as e:
-            print(f"Error retrieving data: {e}")
-            return []
+            print(f"Error counting data: {e}")
+            return 0
+    
+    def _new_id(self) -> str:
+        """Generate a random 128-bit id as 32 hex characters
+        
+        Ids are cut from one os.urandom read of ID_POOL_SIZE ids, so bulk
+        inserts make one system call per pool instead of one per id.
+        """
+        while True:
+            try:
+                return self._id_pool.pop()
+            except IndexError:
+                entropy = os.urandom(16 * ID_POOL_SIZE).hex()
+                self._id_pool = [entropy[i:i + 32] for i in range(0, len(entropy), 32)]
+    
+    def _record_cursor(self) -> sqlite3.Cursor:
+        """Get a read cursor that returns RecordRow tuples for _SELECT_RECORDS queries"""
+        cursor = self._read_connection().cursor()
+        cursor.row_factory = _record_row_factory
+        return cursor
+    
+    def _lookup_cursor(self) -> sqlite3.Cursor:
+        """Get this thread's reusable record cursor for single-row lookups
+        
+        A lookup fetches its row before returning, so the cursor is idle again
+        by the next call. Reads that hand out rows lazily take their own
+        cursor from _record_cursor.
+        """
+        if self.db_path == ':memory:':
+            return self._record_cursor()
+        readers = self._thread_readers()
+        if readers.lookup_cursor is None:
+            readers.lookup_cursor = self._record_cursor()
+        return readers.lookup_cursor
+    
+    def _check_record_cache(self) -> None:
+        """Clear the record cache if another connection has committed since the last check"""
+        now = time.monotonic()
+        if now - self._cache_checked_at < RECORD_CACHE_CHECK_INTERVAL:
+            return
+        # Skipped while a write runs; the next read after it checks
+        if not self._write_lock.acquire(blocking=False):
+            return
+        try:
+            version = self._writer_data_version()
+            self._cache_checked_at = now
+        finally:
+            self._write_lock.release()
+        if version != self._data_version:
+            with self._cache_lock:
+                self._cache_generation += 1
+                self._record_cache.clear()
+            self._data_version = version
+    
+    def _writer_data_version(self) -> int:
+        """Get PRAGMA data_version on the writer, which only changes on other connections' commits"""
+        return self.connection.execute('PRAGMA data_version').fetchone()[0]
+    
+    def _cache_record(self, row: RecordRow, generation: Optional[int] = None) -> None:
+        """Store a committed data_records row in the get_data cache
+        
+        Writers pass no generation. Readers pass the generation seen before
+        their query, and the row is dropped if a write has happened since.
+        """
+        with self._cache_lock:
+            if generation is None:
+                self._cache_generation += 1
+            elif generation != self._cache_generation:
+                return
+            self._record_cache[row.id] = row
+            self._record_cache.move_to_end(row.id)
+            if len(self._record_cache) > RECORD_CACHE_SIZE:
+                self._record_cache.popitem(last=False)
+    
+    @staticmethod
+    def _record_from_row(row: RecordRow) -> Dict[str, Any]:
+        """Convert a data_records row to the record dictionary returned by the API
+        
+        The payload is decoded on every call rather than memoized: callers own
+        the dicts they get back, and orjson decodes a typical record several
+        times faster than copy.deepcopy could copy a cached one.
+        """
+        record = row._asdict()
+        record['data'] = _json_loads(row.data)
+        return record
     
     def get_data_models(self) -> List[Dict[str, Any]]:
         """Get all data models"""
@@ -377,48 +1138,37 @@ class HyperledgerIntegratedDB:
     
     def _validate_data(self, data: Dict[str, Any], model: DataModel) -> None:
         """Validate data against the model schema"""
-        for field in model.fields:
-            if field.required and field.name not in data:
-                raise ValueError(f"Required field '{field.name}' is missing")
-            
-            # Apply default value if field is missing and has a default
-            if field.name not in data and field.default is not None:
-                data[field.name] = field.default
-            
-            if field.name in data:
-                value = data[field.name]
-                
-                # Type validation
-                if field.type == 'text' and not isinstance(value, str):
-                    raise ValueError(f"Field '{field.name}' must be a string")
-                elif field.type == 'integer' and not isinstance(value, int):
-                    raise ValueError(f"Field '{field.name}' must be an integer")
-                elif field.type == 'real' and not isinstance(value, (int, float)):
-                    raise ValueError(f"Field '{field.name}' must be a number")
-                elif field.type == 'boolean' and not isinstance(value, bool):
-                    raise ValueError(f"Field '{field.name}' must be a boolean")
-                elif field.type == 'datetime':
-                    # Accept timestamp or datetime string
-                    if not isinstance(value, (int, float, str)):
-                        raise ValueError(f"Field '{field.name}' must be a datetime")
-                elif field.type == 'json' and not isinstance(value, (dict, list)):
-                    raise ValueError(f"Field '{field.name}' must be a JSON object or array")
+        model._validator(data)
     
     def _add_to_blockchain(self, transaction_type: str, data: Dict[str, Any]) -> str:
         """Add transaction to blockchain"""
-        transaction_id = str(uuid.uuid4())
-        current_time = time.time()
-        
-        # Create blockchain transaction
-        transaction = {
-            'id': transaction_id,
+        transaction = self._build_transaction(transaction_type, data)
+        self._record_transaction(self.connection.cursor(), transaction)
+        return transaction['id']
+    
+    def _build_transaction(self, transaction_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a blockchain transaction with a fresh id, without storing it"""
+        return {
+            'id': self._new_id(),
             'type': transaction_type,
             'data': data,
-            'timestamp': current_time,
+            'timestamp': time.time(),
             'sender': 'system',
             'recipient': 'system',
             'amount': 0.0
         }
+    
+    def _record_transaction(self, cursor: sqlite3.Cursor, transaction: Dict[str, Any]) -> None:
+        """Save a transaction from _build_transaction and queue it for the next block"""
+        data = transaction['data']
+        cursor.execute(_INSERT_TRANSACTION, (
+            transaction['id'],
+            transaction['type'],
+            data.get('record_id'),
+            data.get('model_name'),
+            _json_blob(transaction),
+            transaction['timestamp']
+        ))
         
         # Add to blockchain pending transactions
         self.blockchain.add_transaction(
@@ -427,78 +1177,216 @@ class HyperledgerIntegratedDB:
             amount=0.0,
             data=transaction
         )
-        
-        # Save to database
-        cursor = self.connection.cursor()
-        cursor.execute('''
-            INSERT INTO blockchain_transactions (id, transaction_type, data_id, model_name, transaction_data, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            transaction_id,
-            transaction_type,
-            data.get('record_id'),
-            data.get('model_name'),
-            json.dumps(transaction),
-            current_time
-        ))
-        
-        return transaction_id
     
     def mine_block(self) -> Optional[Dict[str, Any]]:
         """Mine a new block with pending transactions"""
         try:
-            if not self.blockchain.pending_transactions:
-                print("No pending transactions to mine")
-                return None
-            
-            # Mine the block
-            block = self.blockchain.mine_pending_transactions("system")
-            
-            # Save block to database
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                INSERT INTO blockchain_blocks (block_index, hash, previous_hash, timestamp, nonce, transactions_data)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                block.index,
-                block.hash,
-                block.previous_hash,
-                block.timestamp,
-                block.nonce,
-                json.dumps(block.transactions)
-            ))
-            
-            # Update transaction block indices
-            for transaction in block.transactions:
-                if transaction.get('id'):
-                    cursor.execute('''
-                        UPDATE blockchain_transactions 
-                        SET block_index = ?
-                        WHERE id = ?
-                    ''', (block.index, transaction['id']))
+            # Mining takes the pending transactions, so no other write may
+            # queue one until the block is stored
+            with self._write_lock:
+                if not self.blockchain.pending_transactions:
+                    print("No pending transactions to mine")
+                    return None
+                
+                # Mine the block
+                block = self.blockchain.mine_pending_transactions("system")
+                
+                # Save block to database. The transactions are stored in the
+                # encoding the block hash consumed, so a reloaded block rehashes
+                # to its stored hash
+                with self._transaction() as cursor:
+                    cursor.execute(_INSERT_BLOCK, (
+                        block.index,
+                        block.hash,
+                        block.previous_hash,
+                        block.timestamp,
+                        block.nonce,
+                        block.encode_transactions().encode(),
+                        block.version,
+                        block.merkle_root()
+                    ))
                     
-                    # Also update data records
-                    if transaction.get('data', {}).get('record_id'):
-                        cursor.execute('''
-                            UPDATE data_records 
-                            SET blockchain_block_index = ?
-                            WHERE id = ?
-                        ''', (block.index, transaction['data']['record_id']))
-            
-            self.connection.commit()
-            
-            print(f"Block {block.index} mined successfully with {len(block.transactions)} transactions")
-            return {
-                'index': block.index,
-                'hash': block.hash,
-                'timestamp': block.timestamp,
-                'transaction_count': len(block.transactions)
-            }
+                    # Update transaction block indices. Database transactions are
+                    # carried in the data field of the blockchain transaction
+                    transaction_updates = []
+                    record_updates = []
+                    for transaction in block.transactions:
+                        payload = transaction.get('data') or {}
+                        if payload.get('id'):
+                            transaction_updates.append((block.index, payload['id']))
+                            
+                            # Also update data records, one per add_data and
+                            # several per add_data_many batch
+                            recorded = payload.get('data') or {}
+                            if recorded.get('record_id'):
+                                record_updates.append((block.index, recorded['record_id']))
+                            for record_id in recorded.get('record_ids', ()):
+                                record_updates.append((block.index, record_id))
+                    
+                    cursor.executemany(_SET_TRANSACTION_BLOCK, transaction_updates)
+                    cursor.executemany(_SET_RECORD_BLOCK, record_updates)
+                    
+                    if block.version >= 3:
+                        self._store_merkle_proofs(cursor, block)
+                
+                with self._cache_lock:
+                    self._cache_generation += 1
+                    for _, record_id in record_updates:
+                        self._record_cache.pop(record_id, None)
+                
+                print(f"Block {block.index} mined successfully with {len(block.transactions)} transactions")
+                return {
+                    'index': block.index,
+                    'hash': block.hash,
+                    'timestamp': block.timestamp,
+                    'transaction_count': len(block.transactions)
+                }
             
         except Exception as e:
             print(f"Error mining block: {e}")
             return None
     
+    def _store_merkle_proofs(self, cursor: sqlite3.Cursor, block: 'Block') -> None:
+        """Save the inclusion proof of every database transaction in a mined block"""
+        from blockchain import merkle_proof
+        
+        levels = block.merkle_levels()
+        proofs = []
+        for leaf_index, transaction in enumerate(block.transactions):
+            transaction_id = (transaction.get('data') or {}).get('id')
+            if transaction_id:
+                proof = [(sibling.hex(), on_right) for sibling, on_right in merkle_proof(levels, leaf_index)]
+                proofs.append((
+                    transaction_id,
+                    block.index,
+                    leaf_index,
+                    levels[0][leaf_index].hex(),
+                    _json_blob(proof)
+                ))
+        
+        cursor.executemany(_INSERT_MERKLE_PROOF, proofs)
+    
+    def get_proof(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """Get the Merkle inclusion proof of a mined database transaction
+        
+        The proof holds the leaf hash, its index in the block and the sibling
+        path as [sibling hash, sibling is on the right] pairs, hex encoded, with
+        the root of the block it hashes up to. Returns None until the
+        transaction is mined.
+        """
+        try:
+            cursor = self._read_connection().cursor()
+            cursor.execute(_SELECT_PROOF_BY_TRANSACTION, (transaction_id,))
+            row = cursor.fetchone()
+            return self._proof_from_row(row) if row else None
+            
+        except Exception as e:
+            print(f"Error retrieving proof: {e}")
+            return None
+    
+    @staticmethod
+    def _proof_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a _SELECT_PROOFS row to the dictionary returned by get_proof"""
+        proof = dict(row)
+        proof['proof'] = _json_loads(row['proof'])
+        return proof
+    
+    def verify_record_inclusion(self, record_id: str) -> bool:
+        """Check that a record's stored contents are included in a mined block
+        
+        The transaction that last wrote the record must carry its current
+        data. Its leaf is recomputed from the copy hashed into the block and
+        walked up the stored sibling path, costing O(log n) hashes for a block
+        of n transactions, plus one header hash binding the Merkle root to the
+        block. Records changed outside the API, or updated since the last
+        mined block, do not verify.
+        """
+        from blockchain import merkle_leaf, verify_merkle_proof
+        
+        try:
+            cursor = self._read_connection().cursor()
+            cursor.execute(_SELECT_PROOF_RECORD, (record_id,))
+            record = cursor.fetchone()
+            if not record:
+                return False
+            cursor.execute(_SELECT_LAST_RECORD_WRITE, (record_id,))
+            last_write = cursor.fetchone()
+            transaction_id = last_write[0] if last_write else record['blockchain_transaction_id']
+            
+            cursor.execute(_SELECT_PROOF_BY_TRANSACTION, (transaction_id,))
+            row = cursor.fetchone()
+            if not row or not row['merkle_root']:
+                return False
+            proof = self._proof_from_row(row)
+            block = self._find_block(proof['block_index'])
+            if block is None or proof['leaf_index'] >= len(block.transactions):
+                return False
+            
+            transaction = block.transactions[proof['leaf_index']]
+            payload = transaction.get('data') or {}
+            if payload.get('id') != transaction_id or not self._writes_record(cursor, payload, record_id, record):
+                return False
+            
+            root = bytes.fromhex(proof['merkle_root'])
+            path = [(bytes.fromhex(sibling), on_right) for sibling, on_right in proof['proof']]
+            return verify_merkle_proof(merkle_leaf(transaction), path, root) and block.commits_to_merkle_root(root)
+        
+        except Exception as e:
+            print(f"Error verifying record inclusion: {e}")
+            return False
+    
+    def _writes_record(self, cursor: sqlite3.Cursor, transaction: Dict[str, Any], record_id: str,
+                       record: sqlite3.Row) -> bool:
+        """Check that a database transaction wrote a record's stored model and data"""
+        content = transaction.get('data') or {}
+        if content.get('model_name') != record['model_name']:
+            return False
+        data = _canonical_json(_json_loads(record['data']))
+        
+        if transaction.get('type') == 'data_creation':
+            return content.get('record_id') == record_id and _canonical_json(content.get('data')) == data
+        if transaction.get('type') == 'data_update':
+            return content.get('record_id') == record_id and _canonical_json(content.get('new_data')) == data
+        if transaction.get('type') != 'data_batch_creation' or record_id not in content.get('record_ids', ()):
+            return False
+        
+        # A batch commits to the Merkle root of its records as created, so the
+        # root is rebuilt from all of them. A record updated since then was
+        # created with the previous data of its first update
+        from blockchain import merkle_leaf, merkle_root
+        
+        record_ids = list(content['record_ids'])
+        created: Dict[str, Any] = {}
+        for start in range(0, len(record_ids), ID_LOOKUP_BATCH_SIZE):
+            batch = record_ids[start:start + ID_LOOKUP_BATCH_SIZE]
+            placeholders = ', '.join('?' * len(batch))
+            cursor.execute(f'SELECT id, data FROM data_records WHERE id IN ({placeholders})', batch)
+            for row in cursor.fetchall():
+                created[row[0]] = _json_loads(row[1])
+            cursor.execute(_SELECT_RECORD_UPDATES.format(placeholders), batch)
+            for row in cursor.fetchall():
+                created[row[0]] = _json_loads(row[1])['data']['previous_data']
+        
+        if len(created) != len(record_ids):
+            return False
+        leaves = [
+            merkle_leaf({
+                'record_id': batch_id,
+                'model_name': content['model_name'],
+                'data': created[batch_id],
+                'created_at': content.get('created_at')
+            })
+            for batch_id in record_ids
+        ]
+        return merkle_root(leaves).hex() == content.get('records_root')
+    
+    def _find_block(self, block_index: int) -> Optional['Block']:
+        """Find a block in the chain by its index"""
+        chain = self.blockchain.chain
+        if block_index < len(chain) and chain[block_index].index == block_index:
+            return chain[block_index]
+        return next((block for block in chain if block.index == block_index), None)
+    
     def get_blockchain_info(self) -> Dict[str, Any]:
         """Get blockchain information"""
         return {
@@ -509,62 +1397,277 @@ class HyperledgerIntegratedDB:
             'latest_block': {
                 'index': self.blockchain.get_latest_block().index,
                 'hash': self.blockchain.get_latest_block().hash,
+                'merkle_root': self.blockchain.get_latest_block().merkle_root(),
                 'timestamp': self.blockchain.get_latest_block().timestamp
             } if self.blockchain.chain else None
         }
     
-    def search_data(self, model_name: str = None, criteria: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """Search data records based on criteria"""
-        all_data = self.get_all_data(model_name)
+    def search_data(self, model_name: str = None, criteria: Dict[str, Any] = None,
+                    limit: int = None) -> List[Dict[str, Any]]:
+        """Search data records based on criteria
         
+        String criteria match case-insensitive substrings and other values
+        match by equality. Criteria on plain field names are evaluated in SQL
+        with json_extract, so only candidate rows are decoded; the rest (nested
+        values, unusual keys, non-ASCII strings) are checked in Python. With
+        ``limit``, reading stops once that many matches are found.
+        """
         if not criteria:
-            return all_data
+            if limit is None:
+                return self.get_all_data(model_name)
+            try:
+                return list(itertools.islice(self.iter_all_data(model_name), limit))
+            except Exception as e:
+                print(f"Error searching data: {e}")
+                return []
         
-        results = []
-        for record in all_data:
-            match = True
-            record_data = record['data']
-            
-            for key, value in criteria.items():
-                if key not in record_data:
-                    match = False
-                    break
-                
-                if isinstance(value, str) and isinstance(record_data[key], str):
-                    if value.lower() not in record_data[key].lower():
-                        match = False
-                        break
-                elif record_data[key] != value:
-                    match = False
-                    break
+        try:
+            try:
+                return self._search(model_name, criteria, limit, pushdown=True)
+            except sqlite3.OperationalError:
+                # json_extract rejects rows stored with NaN or Infinity, which
+                # older versions wrote; such models are filtered in Python
+                return self._search(model_name, criteria, limit, pushdown=False)
             
-            if match:
+        except Exception as e:
+            print(f"Error searching data: {e}")
+            return []
+    
+    def _search(self, model_name: Optional[str], criteria: Dict[str, Any], limit: Optional[int],
+                pushdown: bool) -> List[Dict[str, Any]]:
+        """Run one search_data query, with criteria evaluated in SQL only if ``pushdown`` is set"""
+        where, params, remaining = self._search_filter(model_name, criteria, pushdown)
+        query = f'{_SELECT_RECORDS} {where} ORDER BY created_at'
+        if limit is not None and not remaining:
+            query += ' LIMIT ?'
+            params.append(limit)
+        cursor = self._record_cursor()
+        cursor.execute(query, params)
+        
+        results = []
+        for row in cursor:
+            if limit is not None and len(results) >= limit:
+                break
+            record = self._record_from_row(row)
+            if _matches_criteria(record['data'], remaining):
                 results.append(record)
+        return results
+    
+    def search_data_many(self, searches: Dict[str, Tuple[Optional[str], Dict[str, Any]]]
+                         ) -> Dict[str, List[Dict[str, Any]]]:
+        """Run several searches in one query
         
+        ``searches`` maps a tag to the ``(model_name, criteria)`` that
+        search_data would take. Each search becomes one arm of a UNION ALL,
+        so SQLite plans and runs them in a single statement. Returns the
+        matching records by tag, each list ordered by creation time.
+        """
+        if not searches:
+            return {}
+        
+        try:
+            try:
+                return self._search_many(searches, pushdown=True)
+            except sqlite3.OperationalError:
+                # As in search_data, rows json_extract cannot read are filtered in Python
+                return self._search_many(searches, pushdown=False)
+            
+        except Exception as e:
+            print(f"Error searching data: {e}")
+            return {tag: [] for tag in searches}
+    
+    def _search_many(self, searches: Dict[str, Tuple[Optional[str], Dict[str, Any]]],
+                     pushdown: bool) -> Dict[str, List[Dict[str, Any]]]:
+        """Run the UNION ALL query of search_data_many"""
+        results: Dict[str, List[Dict[str, Any]]] = {tag: [] for tag in searches}
+        tags = list(searches)
+        arms = []
+        params: List[Any] = []
+        remaining = []
+        for i, tag in enumerate(tags):
+            model_name, criteria = searches[tag]
+            where, arm_params, arm_remaining = self._search_filter(model_name, criteria or {}, pushdown)
+            arms.append(f"SELECT {i}, {', '.join(RecordRow._fields)} FROM data_records {where}")
+            params.extend(arm_params)
+            remaining.append(arm_remaining)
+        
+        cursor = self._read_connection().cursor()
+        cursor.row_factory = None
+        cursor.execute(f"{' UNION ALL '.join(arms)} ORDER BY 1, created_at", params)
+        for row in cursor:
+            record = self._record_from_row(RecordRow._make(row[1:]))
+            if _matches_criteria(record['data'], remaining[row[0]]):
+                results[tags[row[0]]].append(record)
         return results
     
-    def export_data(self, filepath: str) -> bool:
-        """Export all data to JSON file"""
+    @staticmethod
+    def _search_filter(model_name: Optional[str], criteria: Dict[str, Any], pushdown: bool = True
+                       ) -> Tuple[str, List[Any], Dict[str, Any]]:
+        """Split search criteria into a SQL WHERE clause and the criteria left for Python
+        
+        Returns the WHERE clause (empty if nothing is pushed down), its
+        parameters, and the criteria _criterion_sql could not translate, or
+        every criterion when ``pushdown`` is off.
+        """
+        clauses = []
+        params: List[Any] = []
+        remaining = {}
+        if model_name:
+            # Written as a literal so the planner can match the model's partial
+            # field indexes, which a bound parameter cannot prove it satisfies
+            clauses.append(f'model_name = {_sql_literal(model_name)}')
+        
+        for key, value in criteria.items():
+            pushed = _criterion_sql(key, value) if pushdown else None
+            if pushed is None:
+                remaining[key] = value
+            else:
+                clauses.append(pushed[0])
+                params.extend(pushed[1])
+        
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return where, params, remaining
+    
+    def create_search_index(self, field_name: str, model_name: str = None) -> bool:
+        """Index a record field so search_data equality criteria on it can use the index
+        
+        With ``model_name`` the index leads with the model, serving searches
+        within that model; without it the index serves searches across all
+        models.
+        """
         try:
-            data = {
-                'data_models': self.get_data_models(),
-                'data_records': self.get_all_data(),
-                'blockchain_info': self.get_blockchain_info(),
-                'blockchain_blocks': []
-            }
+            if not _JSON_FIELD_NAME.match(field_name):
+                raise ValueError(f"Field '{field_name}' cannot be indexed")
             
-            # Get blockchain blocks
-            cursor = self.connection.cursor()
-            cursor.execute('SELECT * FROM blockchain_blocks ORDER BY block_index')
-            for row in cursor.fetchall():
-                data['blockchain_blocks'].append(dict(row))
+            with self._transaction() as cursor:
+                self._create_field_index(cursor, field_name, model_name)
+            return True
             
-            with open(filepath, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+        except Exception as e:
+            print(f"Error creating search index: {e}")
+            return False
+    
+    @staticmethod
+    def _create_field_index(cursor: sqlite3.Cursor, field_name: str, model_name: str = None) -> None:
+        """Create the json_extract expression index used by search_data for one field
+        
+        ``field_name`` must match _JSON_FIELD_NAME so it can be written into
+        the expression. A model's index is partial, covering only that model's
+        rows, so inserts into other models never update it.
+        """
+        expression = f"json_extract(data, '$.{field_name}')"
+        if model_name is None:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_records_json_{field_name} ON data_records({expression})")
+        else:
+            index_name = f'idx_records_json:{model_name}:{field_name}'.replace('"', '""')
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS "{index_name}" ON data_records({expression}, created_at) '
+                f'WHERE model_name = {_sql_literal(model_name)}'
+            )
+    
+    def export_data(self, filepath: str) -> bool:
+        """Export all data to a file
+        
+        ``.ndjson``/``.jsonl`` and ``.msgpack`` paths are streamed one item at
+        a time (see _export_stream); anything else is written as a single JSON
+        document (see _export_document).
+        """
+        try:
+            if os.path.splitext(filepath)[1].lower() in STREAMING_EXPORT_FORMATS:
+                count = self._export_stream(filepath)
+                print(f"Data exported to {filepath} ({count} items)")
+                return True
             
+            self._export_document(filepath)
             print(f"Data exported to {filepath}")
             return True
             
         except Exception as e:
             print(f"Error exporting data: {e}")
-            return False 
\ No newline at end of file
+            return False 
+    
+    def _export_document(self, filepath: str) -> None:
+        """Write the export as one JSON document, one row at a time
+        
+        The ``data`` column already holds the record payload as JSON text, so
+        it is copied into the output verbatim instead of being decoded and
+        re-encoded; only the surrounding record fields are serialized.
+        """
+        with open(filepath, 'wb') as f:
+            f.write(b'{"data_models": ' + _dumps_export(self.get_data_models()))
+            
+            f.write(b',\n"data_records": [')
+            separator = b'\n'
+            cursor = self._record_cursor()
+            cursor.execute(_SELECT_ALL_RECORDS)
+            for row in cursor:
+                f.write(separator + _record_json(row))
+                separator = b',\n'
+            
+            f.write(b'],\n"blockchain_info": ' + _dumps_export(self.get_blockchain_info()))
+            
+            f.write(b',\n"blockchain_blocks": [')
+            separator = b'\n'
+            for block in self._iter_block_rows():
+                f.write(separator + _dumps_export(block))
+                separator = b',\n'
+            f.write(b']}\n')
+    
+    def _iter_export_items(self) -> Iterator[Tuple[str, Any]]:
+        """Yield (section, item) pairs for every exported object, reading rows lazily
+        
+        Records are yielded as RecordRow tuples so JSON writers can copy their
+        stored payload (see _record_json).
+        """
+        yield 'blockchain_info', self.get_blockchain_info()
+        for model in self.get_data_models():
+            yield 'data_models', model
+        
+        with self._streaming_connection() as connection:
+            cursor = connection.cursor()
+            cursor.row_factory = _record_row_factory
+            cursor.execute(_SELECT_ALL_RECORDS)
+            for row in cursor:
+                yield 'data_records', row
+        
+        for block in self._iter_block_rows():
+            yield 'blockchain_blocks', block
+    
+    def _iter_block_rows(self) -> Iterator[Dict[str, Any]]:
+        """Yield stored blocks as exported, with their transactions as JSON text"""
+        with self._streaming_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute('SELECT * FROM blockchain_blocks ORDER BY block_index')
+            for row in cursor:
+                block = dict(row)
+                if isinstance(block['transactions_data'], bytes):
+                    block['transactions_data'] = block['transactions_data'].decode()
+                yield block
+    
+    def _export_stream(self, filepath: str) -> int:
+        """Write the export as one ``{"section": ..., "item": ...}`` entry per object
+        
+        Only one object is serialized at a time, so memory use no longer grows
+        with the size of the chain. Returns the number of entries written.
+        """
+        if filepath.lower().endswith('.msgpack'):
+            if msgpack is None:
+                raise ImportError("msgpack is required for .msgpack exports")
+            packer = msgpack.Packer(default=str)
+            
+            def encode(section: str, item: Any) -> bytes:
+                if section == 'data_records':
+                    item = self._record_from_row(item)
+                return packer.pack({'section': section, 'item': item})
+        else:
+            def encode(section: str, item: Any) -> bytes:
+                if section == 'data_records':
+                    return b'{"section": "data_records", "item": ' + _record_json(item) + b'}\n'
+                return _dumps_export({'section': section, 'item': item}) + b'\n'
+        
+        count = 0
+        with open(filepath, 'wb') as f:
+            for section, item in self._iter_export_items():
+                f.write(encode(section, item))
+                count += 1
+        return count
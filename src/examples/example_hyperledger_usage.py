@@ -17,14 +17,18 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 from src.core.hyperledger_integrated_db import HyperledgerIntegratedDB
 import json
 import time
+from collections import defaultdict
 
 
 def main():
     """Main example function"""
     print("=== Hyperledger Integrated Database System Example ===\n")
     
-    # Initialize the integrated database system
-    db = HyperledgerIntegratedDB(db_path="example_hyperledger.db")
+    # Set HYPERDB_VERBOSE=1 to print every inserted record, not just the count per batch
+    verbose = os.environ.get('HYPERDB_VERBOSE') == '1'
+    
+    # Open the integrated database system, reusing it if this process already has it open
+    db = HyperledgerIntegratedDB.open(db_path="example_hyperledger.db")
     
     # Example 1: Create a User data model
     print("1. Creating User data model...")
@@ -110,14 +114,8 @@ def main():
         description="Product catalog information"
     )
     
-    # Mine the first block to commit the model creation transactions
-    print("\n3. Mining first block to commit model creation...")
-    block_info = db.mine_block()
-    if block_info:
-        print(f"Block {block_info['index']} mined with {block_info['transaction_count']} transactions")
-    
     # Example 3: Add user data
-    print("\n4. Adding user data...")
+    print("\n3. Adding user data...")
     users = [
         {
             'username': 'john_doe',
@@ -141,54 +139,52 @@ def main():
         }
     ]
     
-    user_ids = []
-    for user_data in users:
-        user_id = db.add_data("User", user_data)
-        if user_id:
-            user_ids.append(user_id)
+    user_ids = db.add_data_many("User", users)
+    if verbose:
+        for user_data, user_id in zip(users, user_ids):
             print(f"Added user: {user_data['username']} (ID: {user_id})")
     
     # Example 4: Add product data
-    print("\n5. Adding product data...")
+    print("\n4. Adding product data...")
+    # The products are imported together, so they share one creation timestamp
+    now = time.time()
     products = [
         {
             'name': 'Laptop',
             'price': 999.99,
             'category': 'Electronics',
             'in_stock': True,
-            'created_at': time.time()
+            'created_at': now
         },
         {
             'name': 'Coffee Mug',
             'price': 12.50,
             'category': 'Kitchen',
             'in_stock': True,
-            'created_at': time.time()
+            'created_at': now
         },
         {
             'name': 'Running Shoes',
             'price': 89.99,
             'category': 'Sports',
             'in_stock': False,
-            'created_at': time.time()
+            'created_at': now
         }
     ]
     
-    product_ids = []
-    for product_data in products:
-        product_id = db.add_data("Product", product_data)
-        if product_id:
-            product_ids.append(product_id)
+    product_ids = db.add_data_many("Product", products)
+    if verbose:
+        for product_data, product_id in zip(products, product_ids):
             print(f"Added product: {product_data['name']} (ID: {product_id})")
     
-    # Mine another block to commit the data creation transactions
-    print("\n6. Mining second block to commit data creation...")
+    # Mine one block to commit the model and data creation transactions together
+    print("\n5. Mining a block to commit models and data...")
     block_info = db.mine_block()
     if block_info:
         print(f"Block {block_info['index']} mined with {block_info['transaction_count']} transactions")
     
     # Example 5: Update some data
-    print("\n7. Updating user data...")
+    print("\n6. Updating user data...")
     if user_ids:
         # Update the first user
         updated_user_data = {
@@ -203,28 +199,32 @@ def main():
             print(f"Updated user: {updated_user_data['username']}")
     
     # Example 6: Search data
-    print("\n8. Searching for data...")
+    print("\n7. Searching for data...")
+    
+    # All three searches run as one query: active users, products in stock, electronics
+    found = db.search_data_many({
+        'active_users': ("User", {'is_active': True}),
+        'in_stock_products': ("Product", {'in_stock': True}),
+        'electronics': ("Product", {'category': 'Electronics'})
+    })
+    active_users = found['active_users']
+    in_stock_products = found['in_stock_products']
+    electronics = found['electronics']
     
-    # Search for active users
-    active_users = db.search_data("User", {'is_active': True})
     print(f"Found {len(active_users)} active users:")
     for user in active_users:
         print(f"  - {user['data']['username']} ({user['data']['email']})")
     
-    # Search for products in stock
-    in_stock_products = db.search_data("Product", {'in_stock': True})
     print(f"\nFound {len(in_stock_products)} products in stock:")
     for product in in_stock_products:
         print(f"  - {product['data']['name']} (${product['data']['price']})")
     
-    # Search for electronics
-    electronics = db.search_data("Product", {'category': 'Electronics'})
     print(f"\nFound {len(electronics)} electronics products:")
     for product in electronics:
         print(f"  - {product['data']['name']} (${product['data']['price']})")
     
     # Example 7: Get specific data
-    print("\n9. Retrieving specific data...")
+    print("\n8. Retrieving specific data...")
     if user_ids:
         user_data = db.get_data(user_ids[0])
         if user_data:
@@ -234,9 +234,18 @@ def main():
             print(f"  Active: {user_data['data']['is_active']}")
             print(f"  Blockchain Transaction ID: {user_data['blockchain_transaction_id']}")
             print(f"  Blockchain Block Index: {user_data['blockchain_block_index']}")
+            
+            proof = db.get_proof(user_data['blockchain_transaction_id'])
+            if proof:
+                print(f"  Merkle Proof: {len(proof['proof'])} sibling hashes up to root {proof['merkle_root'][:16]}...")
+                print(f"  Inclusion Verified: {db.verify_record_inclusion(user_ids[0])}")
+    
+    # Several records by ID come back from one lookup, in the order asked for
+    products_by_id = db.get_data_many(product_ids)
+    print(f"Products by ID: {', '.join(product['data']['name'] for product in products_by_id)}")
     
     # Example 8: View blockchain information
-    print("\n10. Blockchain Information:")
+    print("\n9. Blockchain Information:")
     blockchain_info = db.get_blockchain_info()
     print(f"Chain Length: {blockchain_info['chain_length']}")
     print(f"Pending Transactions: {blockchain_info['pending_transactions']}")
@@ -246,9 +255,11 @@ def main():
     if blockchain_info['latest_block']:
         latest = blockchain_info['latest_block']
         print(f"Latest Block: #{latest['index']} (Hash: {latest['hash'][:16]}...)")
+        if latest['merkle_root']:
+            print(f"Merkle Root: {latest['merkle_root'][:16]}...")
     
     # Example 9: View all data models
-    print("\n11. Data Models:")
+    print("\n10. Data Models:")
     models = db.get_data_models()
     for model in models:
         print(f"Model: {model['name']}")
@@ -261,22 +272,18 @@ def main():
         print()
     
     # Example 10: Export data
-    print("\n12. Exporting data...")
+    print("\n11. Exporting data...")
     if db.export_data("hyperledger_export.json"):
         print("Data exported successfully to hyperledger_export.json")
     
     # Example 11: Get all data
-    print("\n13. All Data Records:")
-    all_data = db.get_all_data()
-    print(f"Total records: {len(all_data)}")
+    print("\n12. All Data Records:")
+    print(f"Total records: {db.count_data()}")
     
-    # Group by model
-    by_model = {}
-    for record in all_data:
-        model = record['model_name']
-        if model not in by_model:
-            by_model[model] = []
-        by_model[model].append(record)
+    # Group by model, decoding records as they are read
+    by_model = defaultdict(list)
+    for record in db.iter_all_data():
+        by_model[record['model_name']].append(record)
     
     for model_name, records in by_model.items():
         print(f"\n{model_name} records ({len(records)}):")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for the blockchain mining and validation paths
+"""
+
+import sys
+import os
+import json
+import hashlib
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from blockchain import (
+    Blockchain, Block, partition_transactions, _compile_pow,
+    merkle_leaf, merkle_levels, merkle_proof, verify_merkle_proof
+)
+
+
+def _make_blockchain(transaction_count: int = 5, difficulty: int = 2) -> Blockchain:
+    """Create a blockchain with some pending transactions"""
+    blockchain = Blockchain(difficulty=difficulty)
+    for i in range(transaction_count):
+        blockchain.add_transaction("alice", "bob", 1.5, {'seq': i, 'note': 'café "quoted"'})
+    return blockchain
+
+
+def test_fast_hash_matches_full_hash():
+    """The templated hash must be bit-compatible with calculate_hash"""
+    blockchain = _make_blockchain()
+    for version in (1, 2, 3):
+        block = Block(1, list(blockchain.pending_transactions), time.time(), "abc", version=version)
+
+        for nonce in (0, 1, 9, 10, 123456789):
+            assert block.calculate_hash_fast(nonce).hex() == block.calculate_hash(nonce)
+
+
+def test_hash_matches_sorted_json_serialization():
+    """Block hashes stay compatible with chains persisted by earlier versions"""
+    blockchain = _make_blockchain()
+    block = Block(3, list(blockchain.pending_transactions), 1700000000.25, "f" * 64, nonce=42, version=1)
+
+    block_string = json.dumps({
+        'index': block.index,
+        'transactions': block.transactions,
+        'timestamp': block.timestamp,
+        'previous_hash': block.previous_hash,
+        'nonce': block.nonce
+    }, sort_keys=True)
+    assert block.calculate_hash() == hashlib.sha256(block_string.encode()).hexdigest()
+
+
+def test_mined_chain_is_valid():
+    """Mined blocks meet the difficulty target and link correctly"""
+    blockchain = _make_blockchain()
+    block = blockchain.mine_pending_transactions("miner")
+
+    assert block.hash.startswith("0" * blockchain.difficulty)
+    assert block.hash == block.calculate_hash()
+    assert blockchain.is_chain_valid()
+
+
+def test_compiled_pow_matches_full_hash():
+    """Difficulty-specialized kernels find the first nonce whose full hash meets the difficulty"""
+    blockchain = _make_blockchain()
+    for version in (1, 2, 3):
+        block = Block(1, list(blockchain.pending_transactions), time.time(), "abc", version=version)
+        for difficulty in (1, 2, 3):
+            expected = next(nonce for nonce in range(100000)
+                            if block.calculate_hash(nonce).startswith("0" * difficulty))
+            kernel = _compile_pow(difficulty)
+            assert kernel(block._midstate, block._suffix, block.encode_nonce, 0, 100000) == expected
+            assert kernel(block._midstate, block._suffix, block.encode_nonce, expected + 1, expected + 1) is None
+
+
+def test_merkle_proofs_verify_against_root():
+    """Every transaction proves into the block root, and altered leaves do not"""
+    blockchain = _make_blockchain(transaction_count=5)
+    block = blockchain.mine_pending_transactions("miner")
+    root = bytes.fromhex(block.merkle_root())
+
+    levels = merkle_levels(block.merkle_leaves())
+    assert levels == block.merkle_levels()
+    assert block.merkle_levels() is block.merkle_levels()
+    assert levels[-1][0] == root
+    for index, transaction in enumerate(block.transactions):
+        proof = merkle_proof(levels, index)
+        assert verify_merkle_proof(merkle_leaf(transaction), proof, root)
+
+    tampered = dict(block.transactions[0], amount=1000.0)
+    assert not verify_merkle_proof(merkle_leaf(tampered), merkle_proof(levels, 0), root)
+    assert block.commits_to_merkle_root(root)
+    assert not block.commits_to_merkle_root(levels[0][0])
+
+
+def test_tampered_chain_is_invalid():
+    """Changing a mined transaction invalidates the chain"""
+    blockchain = _make_blockchain()
+    block = blockchain.mine_pending_transactions("miner")
+
+    tampered = [dict(transaction) for transaction in block.transactions]
+    tampered[0]['amount'] = 1000.0
+    block.transactions = tampered
+    assert not blockchain.is_chain_valid()
+
+
+def test_sealed_blocks_are_read_only():
+    """Mined blocks keep their hash and reject in-place edits"""
+    blockchain = _make_blockchain()
+    block = blockchain.mine_pending_transactions("miner")
+    assert block.calculate_hash() == block.hash
+
+    try:
+        block.transactions[0]['amount'] = 1000.0
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("sealed transaction was modified")
+
+    block.nonce += 1
+    assert not blockchain.is_chain_valid()
+
+
+def test_balances_follow_mined_blocks():
+    """Balances reflect mined transactions only, including mining rewards"""
+    blockchain = _make_blockchain(transaction_count=4)
+    assert blockchain.get_balance("bob") == 0.0
+
+    blockchain.mine_pending_transactions("miner")
+    assert blockchain.get_balance("alice") == -6.0
+    assert blockchain.get_balance("bob") == 6.0
+    assert blockchain.get_balance("miner") == 0.0
+
+    blockchain.mine_pending_transactions("miner")
+    assert blockchain.get_balance("miner") == blockchain.mining_reward
+
+
+def test_bulk_transactions_share_timestamp():
+    """Bulk-added transactions match add_transaction's shape and share a timestamp"""
+    blockchain = Blockchain(difficulty=1)
+    blockchain.add_transactions_bulk([
+        ("alice", "bob", 2.0),
+        ("bob", "carol", 1.0, {'memo': 'rent'}),
+    ])
+
+    first, second = blockchain.pending_transactions
+    assert first['data'] == {} and second['data'] == {'memo': 'rent'}
+    assert first['timestamp'] == second['timestamp']
+
+    blockchain.mine_pending_transactions("miner")
+    assert blockchain.get_balance("bob") == 1.0
+    assert blockchain.is_chain_valid()
+
+
+def test_parallel_replay_matches_serial_balances():
+    """Chains recording conflict-free bins keep the serial balances"""
+    transactions = [
+        ("alice", "bob", 3.0), ("carol", "dave", 2.0), ("bob", "erin", 1.0), ("dave", "carol", 0.5)
+    ]
+    assert partition_transactions([
+        {'sender': s, 'recipient': r, 'amount': a} for s, r, a in transactions
+    ]) == [[0, 2], [1, 3]]
+
+    serial = Blockchain(difficulty=1)
+    parallel = Blockchain(difficulty=1, mining_workers=2)
+    for blockchain in (serial, parallel):
+        blockchain.add_transactions_bulk(transactions)
+    assert serial.mine_pending_transactions("miner").schedule is None
+    assert parallel.mine_pending_transactions("miner").schedule == [[0, 2], [1, 3]]
+
+    for address in ("alice", "bob", "carol", "dave", "erin"):
+        assert parallel.get_balance(address) == serial.get_balance(address)
+    assert parallel.get_balance("erin") == 1.0
+
+
+if __name__ == "__main__":
+    test_fast_hash_matches_full_hash()
+    test_hash_matches_sorted_json_serialization()
+    test_mined_chain_is_valid()
+    test_compiled_pow_matches_full_hash()
+    test_merkle_proofs_verify_against_root()
+    test_tampered_chain_is_invalid()
+    test_sealed_blocks_are_read_only()
+    test_balances_follow_mined_blocks()
+    test_bulk_transactions_share_timestamp()
+    test_parallel_replay_matches_serial_balances()
+    print("Blockchain tests passed")
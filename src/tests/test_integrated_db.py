@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Tests for the storage paths of the Hyperledger Integrated Database System
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from blockchain import verify_merkle_proof
+from src.core.hyperledger_integrated_db import HyperledgerIntegratedDB, RECORD_CACHE_CHECK_INTERVAL
+
+
+ITEM_FIELDS = [
+    {'name': 'name', 'type': 'text', 'required': True},
+    {'name': 'quantity', 'type': 'integer', 'required': False},
+    {'name': 'tags', 'type': 'json', 'required': False}
+]
+
+
+def _make_db(directory: str) -> HyperledgerIntegratedDB:
+    """Create a database with one model and a few mined records"""
+    db = HyperledgerIntegratedDB(os.path.join(directory, "test.db"), blockchain_difficulty=1)
+    db.create_data_model("Item", ITEM_FIELDS, "Test items")
+    for i in range(3):
+        db.add_data("Item", {'name': f'item-{i}', 'quantity': i, 'tags': ['a', 'b']})
+    db.mine_block()
+    return db
+
+
+def test_mining_records_block_index():
+    """Mined records and their blockchain transactions point at the mining block"""
+    with tempfile.TemporaryDirectory() as directory:
+        db = _make_db(directory)
+        records = db.get_all_data("Item")
+        assert len(records) == 3
+        assert db.count_data("Item") == db.count_data() == 3
+        assert db.count_data("Missing") == 0
+        for record in records:
+            assert record['blockchain_block_index'] == 1
+
+        cursor = db.connection.cursor()
+        cursor.execute('SELECT COUNT(*) FROM blockchain_transactions WHERE block_index IS NULL')
+        assert cursor.fetchone()[0] == 0
+
+        cursor.execute('SELECT typeof(transactions_data) FROM blockchain_blocks WHERE block_index = 1')
+        assert cursor.fetchone()[0] == 'blob'
+        cursor.execute('SELECT DISTINCT typeof(data) FROM data_records')
+        assert [row[0] for row in cursor] == ['text']
+        db.disconnect()
+
+
+def test_reload_restores_stored_blocks():
+    """Reopening a database restores its models and mined blocks with their stored hashes"""
+    with tempfile.TemporaryDirectory() as directory:
+        db = _make_db(directory)
+        # Values whose orjson and json.dumps encodings differ
+        db.add_data("Item", {'name': 'wide', 'quantity': 2**70, 'tags': {1: 0.1, 2: 1e16}})
+        db.add_data_many("Item", [{'name': 'batch', 'tags': [1.5e-7, -0.0]}])
+        db.mine_block()
+        db.blockchain.add_transaction("alice", "bob", 2.5, {'note': 'é\u2028', 'when': 1e300})
+        db.mine_block()
+        mined = db.blockchain.chain[-1]
+        db.disconnect()
+
+        reopened = HyperledgerIntegratedDB(os.path.join(directory, "test.db"), blockchain_difficulty=1)
+        assert "Item" in reopened.data_models
+        restored = reopened.blockchain.chain[-1]
+        assert (restored.index, restored.hash, restored.nonce) == (mined.index, mined.hash, mined.nonce)
+        assert len(reopened.blockchain.chain) == 4
+        cursor = reopened.connection.cursor()
+        cursor.execute('SELECT transactions_data FROM blockchain_blocks ORDER BY block_index')
+        for block, (stored,) in zip(reopened.blockchain.chain[1:], cursor.fetchall()):
+            assert block.calculate_hash() == block.hash
+            assert stored == block.encode_transactions().encode()
+
+        # A restored block is unsealed, so in-place edits are hashed even
+        # after its Merkle root has been read
+        assert restored.merkle_root() == mined.merkle_root()
+        restored.transactions[0]['amount'] = 1000.0
+        assert restored.merkle_root() != mined.merkle_root()
+        assert restored.calculate_hash() != restored.hash
+        reopened.disconnect()
+
+
+def test_open_shares_database_until_disconnected():
+    """open returns one instance per path and difficulty until it is disconnected"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "test.db")
+        db = HyperledgerIntegratedDB.open(path, blockchain_difficulty=1)
+        assert HyperledgerIntegratedDB.open(os.path.relpath(path), blockchain_difficulty=1) is db
+        assert HyperledgerIntegratedDB.open(path, blockchain_difficulty=2) is not db
+        HyperledgerIntegratedDB.open(path, blockchain_difficulty=2).disconnect()
+
+        db.create_data_model("Item", ITEM_FIELDS)
+        record_id = db.add_data("Item", {'name': 'a'})
+        assert db.get_data(record_id)['data'] == {'name': 'a'}
+        other = HyperledgerIntegratedDB.open(path, blockchain_difficulty=3)
+        assert other.update_data(record_id, {'name': 'b'})
+        time.sleep(RECORD_CACHE_CHECK_INTERVAL)
+        assert db.get_data(record_id)['data'] == {'name': 'b'}
+        assert [record['data'] for record in db.get_data_many([record_id])] == [{'name': 'b'}]
+        other.disconnect()
+        db.disconnect()
+        reopened = HyperledgerIntegratedDB.open(path, blockchain_difficulty=1)
+        assert reopened is not db and "Item" in reopened.data_models
+        reopened.disconnect()
+
+
+def test_get_data_cache_tracks_writes():
+    """Cached records reflect updates and mining, and callers cannot edit the cache"""
+    with tempfile.TemporaryDirectory() as directory:
+        db = _make_db(directory)
+        record_id = db.add_data("Item", {'name': 'cached', 'tags': ['x']})
+        assert db.get_data(record_id)['blockchain_block_index'] is None
+
+        record = db.get_data(record_id)
+        record['data']['tags'].append('y')
+        assert db.get_data(record_id)['data']['tags'] == ['x']
+
+        assert db.update_data(record_id, {'name': 'renamed'})
+        assert db.get_data(record_id)['data'] == {'name': 'renamed'}
+        assert db.update_data(record_id, {'name': 'renamed again', 'quantity': 2})
+        assert db.get_data(record_id)['data'] == {'name': 'renamed again', 'quantity': 2}
+        assert db.update_data(record_id, {'name': 'third'})
+
+        db.mine_block()
+        assert db.get_data(record_id)['blockchain_block_index'] == 2
+
+        # This instance's own commits keep the cache, so the written row is
+        # served from memory even once the row changes underneath it
+        assert db.update_data(record_id, {'name': 'fourth'})
+        time.sleep(RECORD_CACHE_CHECK_INTERVAL)
+        with db._transaction() as cursor:
+            cursor.execute("UPDATE data_records SET data = '{\"name\": \"hidden\"}' WHERE id = ?", (record_id,))
+        assert db.get_data(record_id)['data'] == {'name': 'fourth'}
+        assert [record['data'] for record in db.get_data_many([record_id])] == [{'name': 'fourth'}]
+        assert db.update_data(record_id, {'name': 'third'})
+
+        # A partly read iterator does not hold lookups on its old snapshot
+        records = db.iter_all_data("Item")
+        next(records)
+        assert db.update_data(record_id, {'name': 'while iterating'})
+        db.mine_block()
+        assert db.get_data(record_id)['data'] == {'name': 'while iterating'}
+        records.close()
+        assert db.get_data(record_id)['data'] == {'name': 'while iterating'}
+        db.disconnect()
+
+
+def test_validation_rejects_wrong_types():
+    """Records must carry required fields with values of the declared type"""
+    with tempfile.TemporaryDirectory() as directory:
+        db = _make_db(directory)
+        assert db.add_data("Item", {'quantity': 1}) is None
+        assert db.add_data("Item", {'name': 'flag', 'quantity': True}) is None
+        assert db.add_data("Item", {'name': 'tagged', 'tags': 'a,b'}) is None
+        assert db.add_data("Item", {'name': 'plain'}) is not None
+        assert db.add_data("Item", {'name': 'dated', 'tags': {'when': datetime(2024, 1, 1)}}) is None
+        assert db.add_data("Item", {'name': 'keyed', 'tags': {1: 'one'}}) is not None
+        assert db.add_data("Item", {'name': 'nan', 'tags': {'x': float('nan')}}) is None
+        assert db.add_data("Item", {'name': 'inf', 'tags': [float('-inf')]}) is None
+        assert db.add_data("Item", {'name': 'uuid', 'tags': {'id': uuid.uuid4()}}) is None
+        assert db.add_data("Item", {'name': 'mixed', 'tags': {1: 'one', 'b': 2}}) is None
+        record_id = db.add_data("Item", {'name': 'finite', 'tags': {'x': 0.1}})
+        assert not db.update_data(record_id, {'name': 'finite', 'tags': {'x': float('nan')}})
+        assert db.get_data(record_id)['data'] == {'name': 'finite', 'tags': {'x': 0.1}}
+        wide = {'name': 'wide', 'quantity': 2**70, 'tags': [-2**63 - 1, 2**64 - 1]}
+        record_id = db.add_data("Item", wide)
+        db._record_cache.clear()
+        assert db.get_data(record_id)['data'] == wide
+        assert db.mine_block()
+        assert db.blockchain.is_chain_valid()
+
+        # Models with equal mutable defaults neither share them nor hand one
+        # object to every record
+        labelled = [{'name': 'labels', 'type': 'json', 'required': False, 'default': []}]
+        assert db.create_data_model("Left", labelled) and db.create_data_model("Right", labelled)
+        left, right = {}, {}
+        db.data_models["Left"]._validator(left)
+        db.data_models["Right"]._validator(right)
+        left['labels'].append('x')
+        assert right['labels'] == [] and db.data_models["Right"].fields[0].default == []
+        first, second = {}, {}
+        db.data_models["Left"]._validator(first)
+        db.data_models["Left"]._validator(second)
+        assert first['labels'] == [] and first['labels'] is not second['labels']
+        db.disconnect()
+
+
+def test_search_matches_python_filtering():
+    """SQL-evaluated criteria keep the substring and equality semantics of search_data"""
+    with tempfile.TemporaryDirectory() as directory:
+        db = _make_db(directory)
+        db.add_data("Item", {'name': 'Big_Box 50%', 'quantity': 1})
+        db.add_data("Item", {'name': 'École', 'tags': {'a': 1}})
+        assert db.create_search_index('quantity')
+
+        def names(criteria):
+            return sorted(record['data']['name'] for record in db.search_data("Item", criteria))
+
+        assert names({'name': 'ITEM'}) == ['item-0', 'item-1', 'item-2']
+        assert names({'name': '_box 50%'}) == ['Big_Box 50%']
+        assert names({'name': 'é'}) == ['École']
+        assert names({'quantity': 1}) == ['Big_Box 50%', 'item-1']
+        assert names({'quantity': True}) == ['Big_Box 50%', 'item-1']
+        assert names({'quantity': 1, 'name': 'big'}) == ['Big_Box 50%']
+        assert names({'tags': {'a': 1}}) == ['École']
+        assert names({'missing': None}) == []
+
+        assert len(db.search_data("Item", {'name': 'item'}, limit=2)) == 2
+
+        searches = {
+            'ones': ("Item", {'quantity': 1}),
+            'tagged': ("Item", {'tags': {'a': 1}}),
+            'items': ("Item", {'name': 'ITEM'}),
+            'all': (None, None),
+            'none': ("Missing", {'name': 'x'})
+        }
+        found = db.search_data_many(searches)
+        for tag, (model_name, criteria) in searches.items():
+            assert found[tag] == db.search_data(model_name, criteria)
+
+        cursor = db.connection.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_records_json:%'")
+        assert [row[0] for row in cursor] == ['idx_records_json:Item:quantity']
+        where, params, _ = db._search_filter("Item", {'quantity': 1})
+        cursor.execute(f'EXPLAIN QUERY PLAN SELECT id FROM data_records {where} ORDER BY created_at', params)
+        assert 'idx_records_json:Item:quantity' in cursor.fetchone()['detail']
+        assert len(db.search_data("Item", {'tags': ['a', 'b']}, limit=1)) == 1
+        assert [r['data']['name'] for r in db.iter_all_data("Item")][:2] == ['item-0', 'item-1']
+        db.disconnect()
+
+
+def test_search_reads_rows_with_non_finite_floats():
+    """Rows stored with NaN by older versions are still matched, in Python"""
+    with tempfile.TemporaryDirectory() as directory:
+        db = _make_db(directory)
+        assert db.create_data_model("Note", [{'name': 'title', 'type': 'text'}])
+        db.add_data("Note", {'title': 'current', 'score': 1})
+        with db._transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO data_records (id, model_name, data, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                ('legacy', 'Note', '{"title": "legacy", "score": NaN}', 0.0, 0.0)
+            )
+
+        assert [r['id'] for r in db.search_data("Note", {'title': 'legacy'})] == ['legacy']
+        assert [r['data']['title'] for r in db.search_data("Note", {'score': 1})] == ['current']
+        found = db.search_data_many({'legacy': ("Note", {'title': 'LEG'}), 'items': ("Item", {'quantity': 1})})
+        assert [r['id'] for r in found['legacy']] == ['legacy']
+        assert [r['data']['name'] for r in found['items']] == ['item-1']
+        assert db.search_data_many({}) == {}
+        db.disconnect()
+
+
+def test_streaming_export_matches_json_export():
+    """NDJSON exports hold the same models, records and blocks as the JSON export"""
+    with tempfile.TemporaryDirectory() as directory:
+        db = _make_db(directory)
+        json_path = os.path.join(directory, "export.json")
+        ndjson_path = os.path.join(directory, "export.ndjson")
+        assert db.export_data(json_path)
+        assert db.export_data(ndjson_path)
+        db.disconnect()
+
+        with open(json_path) as f:
+            document = json.load(f)
+        sections = {}
+        with open(ndjson_path) as f:
+            for line in f:
+                entry = json.loads(line)
+                sections.setdefault(entry['section'], []).append(entry['item'])
+
+        for section in ('data_models', 'data_records', 'blockchain_blocks'):
+            assert sections[section] == document[section]
+        assert sections['blockchain_info'] == [document['blockchain_info']]
+
+
+def test_record_inclusion_proofs():
+    """Records verify against their block's Merkle root only once mined"""
+    with tempfile.TemporaryDirectory() as directory:
+        db = _make_db(directory)
+        record_id = db.add_data("Item", {'name': 'pending'})
+        assert not db.verify_record_inclusion(record_id)
+        assert db.get_proof(db.get_data(record_id)['blockchain_transaction_id']) is None
+
+        db.mine_block()
+        for record in db.get_all_data("Item"):
+            assert db.verify_record_inclusion(record['id'])
+
+        proof = db.get_proof(db.get_data(record_id)['blockchain_transaction_id'])
+        path = [(bytes.fromhex(sibling), on_right) for sibling, on_right in proof['proof']]
+        assert verify_merkle_proof(bytes.fromhex(proof['leaf_hash']), path, bytes.fromhex(proof['merkle_root']))
+        assert proof['merkle_root'] == db.get_blockchain_info()['latest_block']['merkle_root']
+        assert not db.verify_record_inclusion("missing")
+
+        # Only the data the mined transaction carries verifies
+        with db._transaction() as cursor:
+            cursor.execute("UPDATE data_records SET data = '{\"name\": \"forged\"}' WHERE id = ?", (record_id,))
+        assert not db.verify_record_inclusion(record_id)
+        with db._transaction() as cursor:
+            cursor.execute("UPDATE data_records SET data = '{\"name\": \"pending\"}' WHERE id = ?", (record_id,))
+        assert db.verify_record_inclusion(record_id)
+
+        assert db.update_data(record_id, {'name': 'updated'})
+        assert not db.verify_record_inclusion(record_id)
+        db.mine_block()
+        assert db.verify_record_inclusion(record_id)
+        db.disconnect()
+
+
+def test_add_data_many_logs_one_transaction():
+    """A batch is validated as a whole and logged as one transaction over its Merkle root"""
+    from blockchain import merkle_leaf, merkle_root
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = _make_db(directory)
+        pending = len(db.blockchain.pending_transactions)
+        assert db.add_data_many("Item", [{'name': 'ok'}, {'quantity': 2}]) == []
+        assert len(db.blockchain.pending_transactions) == pending
+
+        batch = [{'name': f'batch-{i}', 'quantity': i} for i in range(5)]
+        record_ids = db.add_data_many("Item", batch)
+        assert len(record_ids) == 5
+        assert [db.get_data(record_id)['data'] for record_id in record_ids] == batch
+        db._record_cache.clear()
+        reversed_ids = record_ids[::-1] + ['missing', record_ids[0]]
+        fetched = db.get_data_many(reversed_ids)
+        assert [record['id'] for record in fetched] == record_ids[::-1] + [record_ids[0]]
+        assert [record['data'] for record in db.get_data_many(record_ids)] == batch
+        assert len(db.blockchain.pending_transactions) == pending + 1
+
+        payload = db.blockchain.pending_transactions[-1]['data']['data']
+        assert payload['record_ids'] == record_ids
+        leaves = [
+            merkle_leaf({'record_id': record_id, 'model_name': 'Item', 'data': data,
+                         'created_at': payload['created_at']})
+            for record_id, data in zip(record_ids, batch)
+        ]
+        assert payload['records_root'] == merkle_root(leaves).hex()
+
+        db.mine_block()
+        for record_id in record_ids:
+            assert db.get_data(record_id)['blockchain_block_index'] == 2
+            assert db.verify_record_inclusion(record_id)
+
+        # Batch records verify against the batch root, rebuilt from the data
+        # each record was created with
+        assert db.update_data(record_ids[1], {'name': 'changed'})
+        db.mine_block()
+        assert db.verify_record_inclusion(record_ids[0]) and db.verify_record_inclusion(record_ids[1])
+        with db._transaction() as cursor:
+            cursor.execute("UPDATE data_records SET data = '{\"name\": \"forged\"}' WHERE id = ?", (record_ids[2],))
+        assert not db.verify_record_inclusion(record_ids[2])
+        db.disconnect()
+
+
+def test_threads_read_and_write_concurrently():
+    """Writers on several threads serialize while each thread reads on its own connection"""
+    with tempfile.TemporaryDirectory() as directory:
+        db = _make_db(directory)
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(10):
+                    record_id = db.add_data("Item", {'name': f'thread-{n}-{i}', 'quantity': n})
+                    assert db.get_data(record_id)['data']['name'] == f'thread-{n}-{i}'
+                assert len(db.search_data("Item", {'quantity': n})) >= 10
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(10, 14)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(db.get_all_data("Item")) == 43
+        assert db.mine_block()
+        assert all(record['blockchain_block_index'] for record in db.get_all_data("Item"))
+        # Worker threads' connections are closed when the threads exit
+        assert db._read_connections == db._local.readers.opened
+        assert len(db._read_connections) == 1
+        db.disconnect()
+        assert db._read_connections == []
+
+
+if __name__ == "__main__":
+    test_mining_records_block_index()
+    test_reload_restores_stored_blocks()
+    test_open_shares_database_until_disconnected()
+    test_get_data_cache_tracks_writes()
+    test_validation_rejects_wrong_types()
+    test_search_matches_python_filtering()
+    test_search_reads_rows_with_non_finite_floats()
+    test_streaming_export_matches_json_export()
+    test_record_inclusion_proofs()
+    test_add_data_many_logs_one_transaction()
+    test_threads_read_and_write_concurrently()
+    print("Integrated database tests passed")
@@ -15,7 +15,7 @@ def test_validation():
     print("=== Validation Test ===\n")
     
     # Initialize database
-    db = HyperledgerIntegratedDB("validation_test.db")
+    db = HyperledgerIntegratedDB.open("validation_test.db")
     
     # Create a test model
     test_fields = [
@@ -27,7 +27,6 @@ def test_validation():
     ]
     
     db.create_data_model("TestModel", test_fields, "Test model for validation")
-    db.mine_block()
     
     print("1. Testing valid data...")
     try: